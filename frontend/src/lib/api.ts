@@ -10,7 +10,18 @@ export async function ingestPDF(file: File) {
   });
 
   if (!res.ok) throw new Error("Failed to upload PDF");
-  return res.json();
+
+  // Ingestion runs as a background job; poll until it finishes
+  let job = await res.json();
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    const poll = await fetch(`${API_BASE}/ingest/${job.job_id}`, { cache: "no-store" });
+    if (!poll.ok) throw new Error("Failed to check ingest status");
+    job = await poll.json();
+  }
+
+  if (job.status !== "completed") throw new Error(job.error || "Ingestion failed");
+  return job.result;
 }
 
 export async function askQuestion(sessionId: number, question: string) {
@@ -1,11 +1,34 @@
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from router.ask import router as ask_router
 from router.health import router as health_router
 from router.ingest import router as ingest_router
 from fastapi.middleware.cors import CORSMiddleware
+from core.ingest_jobs import ingest_jobs
+from utils.pdf_partition import shutdown_partition_executor
+from core.vectorstore import shutdown_vector_access
+from core.warmup import warmup, mark_ready
+from config import WARMUP_ON_STARTUP
 
-app = FastAPI(title="Agentic RAG", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ingest_jobs.start()
+    # Serve liveness right away; models load in the background
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warmup())
+    else:
+        mark_ready()
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await ingest_jobs.stop()
+    shutdown_partition_executor()
+    shutdown_vector_access()
+
+app = FastAPI(title="Agentic RAG", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
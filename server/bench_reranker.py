@@ -0,0 +1,134 @@
+# bench_reranker.py
+# Compares the PyTorch and ONNX reranker backends on latency and ranking agreement:
+#   python bench_reranker.py --queries 50 --docs 10
+#   python bench_reranker.py --pairs rerank_sample.jsonl --onnx-fp32
+# A --pairs file holds one {"query": ..., "passages": [...]} object per line.
+import argparse
+import json
+import random
+import statistics
+import time
+import numpy as np
+from config import RERANKER_MODEL, RERANKER_ONNX_DIR, RERANKER_ONNX_THREADS
+from core.reranker import load_cross_encoder
+from core.reranker_onnx import OnnxCrossEncoder, ensure_onnx_model
+
+SAMPLE_QUERIES = [
+    "What was total net sales in the third quarter?",
+    "How did operating margin change year over year?",
+    "What are the main risk factors related to supply chain?",
+    "How much cash was returned to shareholders through buybacks?",
+    "What drove the increase in services revenue?",
+    "What is the effective tax rate for the period?",
+]
+
+SAMPLE_PASSAGES = [
+    "Total net sales increased 5% compared to the same quarter last year, driven by Services.",
+    "Operating margin was 29.6% compared to 28.1% in the prior year period.",
+    "The Company depends on component and product manufacturing performed by outsourcing partners.",
+    "During the quarter the Company repurchased $23.5 billion of its common stock.",
+    "Services net sales grew due to higher advertising, cloud and payment services revenue.",
+    "The effective tax rate was 15.2%, lower than the statutory federal rate of 21%.",
+    "<table><tr><th>Segment</th><th>Net sales</th></tr><tr><td>Americas</td><td>37,678</td></tr></table>",
+    "Research and development expense increased due to headcount-related costs.",
+    "Foreign currency fluctuations reduced net sales by approximately 1%.",
+    "The Company has a $10.0 billion commercial paper program.",
+]
+
+
+def load_queries(path, n_queries, n_docs, seed):
+    if path:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [(row["query"], row["passages"]) for row in rows[:n_queries]]
+
+    rng = random.Random(seed)
+    return [
+        (rng.choice(SAMPLE_QUERIES), rng.sample(SAMPLE_PASSAGES, min(n_docs, len(SAMPLE_PASSAGES))))
+        for _ in range(n_queries)
+    ]
+
+
+def rank(scores):
+    return np.argsort(np.argsort(-np.asarray(scores)))
+
+
+def spearman(a, b):
+    ra, rb = rank(a), rank(b)
+    if len(ra) < 2 or ra.std() == 0 or rb.std() == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def run_backend(model, queries, warmup=3):
+    for query, passages in queries[:warmup]:
+        model.predict([(query, p) for p in passages])
+
+    latencies, all_scores = [], []
+    for query, passages in queries:
+        start = time.perf_counter()
+        scores = model.predict([(query, p) for p in passages])
+        latencies.append((time.perf_counter() - start) * 1000)
+        all_scores.append(np.asarray(scores, dtype=np.float32))
+    return latencies, all_scores
+
+
+def summarize(name, latencies):
+    ordered = sorted(latencies)
+    return {
+        "backend": name,
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+def agreement(reference, candidate, top_k=3):
+    top1 = [int(np.argmax(r) == np.argmax(c)) for r, c in zip(reference, candidate)]
+    overlap = [
+        len(set(np.argsort(-r)[:top_k]) & set(np.argsort(-c)[:top_k])) / min(top_k, len(r))
+        for r, c in zip(reference, candidate)
+    ]
+    return {
+        "spearman": round(statistics.fmean(spearman(r, c) for r, c in zip(reference, candidate)), 4),
+        "top1_agreement": round(statistics.fmean(top1), 4),
+        f"top{top_k}_overlap": round(statistics.fmean(overlap), 4),
+        "max_abs_score_diff": round(max(float(np.max(np.abs(r - c))) for r, c in zip(reference, candidate)), 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reranker backends against the PyTorch baseline.")
+    parser.add_argument("--pairs", help="JSONL file of {query, passages}; defaults to synthetic 10-Q snippets")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--docs", type=int, default=10, help="passages per synthetic query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--onnx-fp32", action="store_true", help="also benchmark the unquantized ONNX graph")
+    args = parser.parse_args()
+
+    queries = load_queries(args.pairs, args.queries, args.docs, args.seed)
+
+    backends = [
+        ("torch", load_cross_encoder("torch")),
+        ("onnx-int8", OnnxCrossEncoder(
+            ensure_onnx_model(RERANKER_MODEL, RERANKER_ONNX_DIR, quantize=True), threads=RERANKER_ONNX_THREADS
+        )),
+    ]
+    if args.onnx_fp32:
+        backends.append(("onnx-fp32", OnnxCrossEncoder(
+            ensure_onnx_model(RERANKER_MODEL, RERANKER_ONNX_DIR, quantize=False), threads=RERANKER_ONNX_THREADS
+        )))
+
+    report = []
+    baseline_scores = None
+    for name, model in backends:
+        latencies, scores = run_backend(model, queries)
+        row = summarize(name, latencies)
+        if baseline_scores is None:
+            baseline_scores = scores
+        else:
+            row.update(agreement(baseline_scores, scores))
+            row["speedup_p50"] = round(report[0]["p50_ms"] / row["p50_ms"], 2)
+        report.append(row)
+
+    print(json.dumps({"model": RERANKER_MODEL, "queries": len(queries), "results": report}, indent=2))
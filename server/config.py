@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,3 +7,102 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 PERSIST_DIR = os.getenv("PERSIST_DIR", "./chroma_db")
 MAX_HISTORY = 5
+
+# Startup: load models and open the vector store in the background (see /health/ready)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Vector backend: "chroma" (see CHROMA_MODE) or "hnsw", a memory-mapped local index (HNSW_* below)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # chroma | hnsw
+VECTORSTORE_WORKERS = int(os.getenv("VECTORSTORE_WORKERS", "8"))  # threads for blocking vector store calls
+
+# Chroma: "embedded" opens PERSIST_DIR in-process, "client" talks to a Chroma server
+CHROMA_MODE = os.getenv("CHROMA_MODE", "embedded")  # embedded | client
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
+CHROMA_SSL = os.getenv("CHROMA_SSL", "false").lower() == "true"
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "langchain")  # langchain_chroma's default name
+
+# Ingestion
+IMAGE_SUMMARY_CONCURRENCY = int(os.getenv("IMAGE_SUMMARY_CONCURRENCY", "8"))
+IMAGE_MIN_AREA = int(os.getenv("IMAGE_MIN_AREA", str(100 * 100)))  # pixels; smaller images are skipped
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1024"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "80"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "1000"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+INGEST_BATCH_WRITE_SIZE = int(os.getenv("INGEST_BATCH_WRITE_SIZE", "2000"))
+INGEST_BATCH_MAX_WAIT_MS = float(os.getenv("INGEST_BATCH_MAX_WAIT_MS", "2000"))  # then write a partial batch
+INGEST_PIPELINE_DEPTH = int(os.getenv("INGEST_PIPELINE_DEPTH", "2"))
+PARTITION_MODE = os.getenv("PARTITION_MODE", "single")  # single | sharded
+PARTITION_SHARD_PAGES = int(os.getenv("PARTITION_SHARD_PAGES", "10"))
+PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "2000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "0"))
+SPOOL_DIR = os.getenv("SPOOL_DIR", tempfile.gettempdir())
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "100"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Local stores (kept next to the Chroma directory)
+DATA_DIR = os.getenv("DATA_DIR", "./data")
+INGEST_REGISTRY_PATH = os.getenv("INGEST_REGISTRY_PATH", os.path.join(DATA_DIR, "ingest_registry.sqlite3"))
+PARENT_STORE_PATH = os.getenv("PARENT_STORE_PATH", os.path.join(DATA_DIR, "parents.sqlite3"))
+IMAGE_SUMMARY_CACHE_PATH = os.getenv("IMAGE_SUMMARY_CACHE_PATH", os.path.join(DATA_DIR, "image_summaries.sqlite3"))
+RERANKER_ONNX_DIR = os.getenv("RERANKER_ONNX_DIR", os.path.join(DATA_DIR, "reranker_onnx"))
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", os.path.join(DATA_DIR, "answer_cache.sqlite3"))
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", os.path.join(DATA_DIR, "lexical_index.sqlite3"))
+
+# HNSW backend: immutable segments viewed via mmap, metadata in SQLite
+HNSW_INDEX_DIR = os.getenv("HNSW_INDEX_DIR", os.path.join(DATA_DIR, "hnsw"))
+HNSW_DTYPE = os.getenv("HNSW_DTYPE", "f16")  # f32 | f16 | i8; f16 halves 3072-dim vectors
+HNSW_CONNECTIVITY = int(os.getenv("HNSW_CONNECTIVITY", "16"))
+HNSW_EXPANSION_ADD = int(os.getenv("HNSW_EXPANSION_ADD", "128"))
+HNSW_EXPANSION_SEARCH = int(os.getenv("HNSW_EXPANSION_SEARCH", "64"))
+HNSW_MAX_SEGMENTS = int(os.getenv("HNSW_MAX_SEGMENTS", "16"))
+HNSW_EXACT_MAX = int(os.getenv("HNSW_EXACT_MAX", "4096"))  # filters matching fewer chunks are scanned exactly
+
+# Retrieval
+# Start retrieval alongside intent routing; dropped if the turn is conversational
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+LEXICAL_K = int(os.getenv("LEXICAL_K", "10"))
+LEXICAL_MAX_DF_RATIO = float(os.getenv("LEXICAL_MAX_DF_RATIO", "0.5"))  # skip query terms in more chunks
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Context packing: "window" sends neighbouring elements of each hit,
+# "full" sends every top parent filing whole
+CONTEXT_MODE = os.getenv("CONTEXT_MODE", "window")  # window | full
+CONTEXT_MAX_HITS = int(os.getenv("CONTEXT_MAX_HITS", "5"))
+CONTEXT_WINDOW_ELEMENTS = int(os.getenv("CONTEXT_WINDOW_ELEMENTS", "3"))  # on each side of a hit
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Reranker
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")  # torch | onnx
+RERANKER_ONNX_QUANTIZE = os.getenv("RERANKER_ONNX_QUANTIZE", "true").lower() == "true"
+RERANKER_ONNX_THREADS = int(os.getenv("RERANKER_ONNX_THREADS", "0"))  # 0 = onnxruntime default
+RERANK_BATCHING = os.getenv("RERANK_BATCHING", "true").lower() == "true"
+RERANK_MAX_BATCH_PAIRS = int(os.getenv("RERANK_MAX_BATCH_PAIRS", "64"))
+RERANK_MAX_WAIT_MS = float(os.getenv("RERANK_MAX_WAIT_MS", "5"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "50000"))  # (query, chunk) scores; 0 disables
+
+# Document grading: "llm" asks the LLM about every retrieved document; "score"
+# trusts the reranker's best hit score (ms-marco logits) and only sends
+# documents scoring between the two thresholds to the LLM
+GRADING_MODE = os.getenv("GRADING_MODE", "llm")  # llm | score
+GRADE_SCORE_PASS = float(os.getenv("GRADE_SCORE_PASS", "3.0"))  # >= passes without an LLM call
+GRADE_SCORE_FAIL = float(os.getenv("GRADE_SCORE_FAIL", "-3.0"))  # <= is dropped without an LLM call
+# LLM grading sends all documents in one structured call, split at this many characters
+GRADER_BATCHING = os.getenv("GRADER_BATCHING", "true").lower() == "true"
+GRADER_BATCH_MAX_CHARS = int(os.getenv("GRADER_BATCH_MAX_CHARS", "60000"))
+
+# Answer cache
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # cosine similarity
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+ANSWER_CACHE_MAX_PER_SCOPE = int(os.getenv("ANSWER_CACHE_MAX_PER_SCOPE", "500"))  # newest kept per filing set
+
+# Embedding cache
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
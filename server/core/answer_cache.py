@@ -0,0 +1,244 @@
+# core/answer_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import (
+    ANSWER_CACHE_PATH,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_MAX_PER_SCOPE,
+)
+from utils.lazy import lazy_singleton
+
+
+class AnswerCache:
+    """
+    Semantic cache of graded /ask answers. An entry is served when the new
+    question embeds within `threshold` cosine of a cached one AND targets
+    the same set of filings (scope), so an ingest or delete inside the
+    scope turns every entry for it into a miss; prune_scopes() then drops
+    them. Entries expire after ttl_seconds, are dropped when a filing they
+    cited goes away, and each scope keeps its newest max_per_scope.
+
+    Each scope's unit vectors are mirrored in memory on first lookup and
+    scored with one matmul outside the lock.
+    """
+
+    def __init__(self, path: str, threshold: float, ttl_seconds: int, max_entries: int, max_per_scope: int):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_per_scope = max_per_scope
+        self._lock = threading.Lock()
+        # scope key -> (answer ids, created_at, unit vectors), replaced rather than mutated
+        self._scopes: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT NOT NULL,
+                scope_filter TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_answers_scope ON answers(scope, created_at);
+            CREATE INDEX IF NOT EXISTS idx_answers_filter ON answers(scope_filter);
+            CREATE TABLE IF NOT EXISTS answer_parents (
+                answer_id INTEGER NOT NULL REFERENCES answers(id) ON DELETE CASCADE,
+                parent_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_answer_parents ON answer_parents(parent_id);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _scope_key(scope: List[str]) -> str:
+        # Unscoped questions span every filing; hash rather than store the list
+        return hashlib.sha256(json.dumps(sorted(scope)).encode()).hexdigest()
+
+    def _load(self, key: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The in-memory mirror of one scope; call with the lock held."""
+        entries = self._scopes.get(key)
+        if entries is None:
+            rows = self._conn.execute(
+                "SELECT id, created_at, embedding FROM answers WHERE scope = ? ORDER BY id", (key,)
+            ).fetchall()
+            entries = (
+                np.array([row[0] for row in rows], dtype=np.int64),
+                np.array([row[1] for row in rows], dtype=np.float64),
+                np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                if rows else np.empty((0, 0), dtype=np.float32),
+            )
+            self._scopes[key] = entries
+        return entries
+
+    def _delete(self, victims: List[Tuple[int, str]]):
+        """Deletes answer rows and their mirrored vectors; call with the lock held."""
+        self._conn.executemany("DELETE FROM answers WHERE id = ?", [(answer_id,) for answer_id, _ in victims])
+        by_scope: Dict[str, List[int]] = {}
+        for answer_id, key in victims:
+            by_scope.setdefault(key, []).append(answer_id)
+        for key, answer_ids in by_scope.items():
+            if key not in self._scopes:
+                continue
+            ids, created, matrix = self._scopes[key]
+            keep = ~np.isin(ids, answer_ids)
+            if keep.any():
+                self._scopes[key] = (ids[keep], created[keep], matrix[keep])
+            else:
+                del self._scopes[key]
+
+    def lookup(self, embedding: List[float], scope: List[str]) -> Optional[dict]:
+        query = np.array(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        with self._lock:
+            ids, created, matrix = self._load(self._scope_key(scope))
+
+        row, best_score = None, self.threshold
+        if len(ids):
+            scores = matrix @ query  # stored vectors are unit length
+            scores[created < time.time() - self.ttl_seconds] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                best_score = float(scores[best])
+                with self._lock:
+                    # May have been evicted since the snapshot
+                    row = self._conn.execute(
+                        "SELECT question, answer, sources FROM answers WHERE id = ?", (int(ids[best]),)
+                    ).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        question, answer, sources = row
+        return {
+            "question": question,
+            "answer": answer,
+            "sources": json.loads(sources),
+            "similarity": best_score,
+        }
+
+    def put(
+        self,
+        question: str,
+        embedding: List[float],
+        scope: List[str],
+        answer: str,
+        sources: List[str],
+        scope_filter: dict,
+    ):
+        """scope_filter is the ticker/year/period filter scope was resolved from."""
+        vector = np.array(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        key = self._scope_key(scope)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (scope, scope_filter, question, embedding, answer, sources, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, json.dumps(scope_filter, sort_keys=True), question, vector.tobytes(),
+                    answer, json.dumps(sources), now,
+                ),
+            )
+            answer_id = cursor.lastrowid
+            # Scope changes already miss; cited filings also drop the row eagerly
+            self._conn.executemany(
+                "INSERT INTO answer_parents (answer_id, parent_id) VALUES (?, ?)",
+                [(answer_id, pid) for pid in set(sources)],
+            )
+            if key in self._scopes:
+                ids, created, matrix = self._scopes[key]
+                self._scopes[key] = (
+                    np.append(ids, answer_id),
+                    np.append(created, now),
+                    np.vstack([matrix, vector]) if len(ids) else vector[None, :],
+                )
+            self._evict(key)
+            self._conn.commit()
+
+    def _evict(self, key: str):
+        victims = self._conn.execute(
+            "SELECT id, scope FROM answers WHERE created_at < ? "
+            "OR id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?) "
+            "OR (scope = ? AND id NOT IN (SELECT id FROM answers WHERE scope = ? ORDER BY id DESC LIMIT ?))",
+            (time.time() - self.ttl_seconds, self.max_entries, key, key, self.max_per_scope),
+        ).fetchall()
+        self._delete(victims)
+
+    def invalidate_parent(self, parent_id: str) -> int:
+        with self._lock:
+            victims = self._conn.execute(
+                "SELECT id, scope FROM answers WHERE id IN "
+                "(SELECT answer_id FROM answer_parents WHERE parent_id = ?)",
+                (parent_id,),
+            ).fetchall()
+            self._delete(victims)
+            self._conn.commit()
+        return len(victims)
+
+    def prune_scopes(self, resolve_scope: Callable[[dict], List[str]]) -> int:
+        """
+        Drops entries whose scope no longer matches what their filter
+        resolves to, e.g. after an ingest. resolve_scope maps a stored
+        filter to the parent ids it selects now. Returns the number dropped.
+        """
+        with self._lock:
+            filters = [row[0] for row in self._conn.execute("SELECT DISTINCT scope_filter FROM answers")]
+        current = {f: self._scope_key(resolve_scope(json.loads(f))) for f in filters}
+
+        with self._lock:
+            victims = [
+                victim
+                for scope_filter, key in current.items()
+                for victim in self._conn.execute(
+                    "SELECT id, scope FROM answers WHERE scope_filter = ? AND scope != ?", (scope_filter, key)
+                )
+            ]
+            self._delete(victims)
+            self._conn.commit()
+        return len(victims)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+
+# Opened on first use, not at import
+@lazy_singleton
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache(
+        ANSWER_CACHE_PATH,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        max_per_scope=ANSWER_CACHE_MAX_PER_SCOPE,
+    )
@@ -1,8 +1,8 @@
-from core.prompt import prompt, re_write_prompt, grader_prompt, hallucination_prompt, answer_grader_prompt, router_prompt
-from core.llm import llm
+from core.prompt import prompt, re_write_prompt, grader_prompt, batch_grader_prompt, hallucination_prompt, answer_grader_prompt, router_prompt
+from core.llm import get_llm
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import List, Literal, Tuple
 
 parser = StrOutputParser()
 
@@ -13,13 +13,13 @@ class RouteQuery(BaseModel):
     )
 
 def get_router_chain():
-    return router_prompt | llm.with_structured_output(RouteQuery)
+    return router_prompt | get_llm().with_structured_output(RouteQuery)
 
 def get_chain():
-    return prompt | llm | parser
+    return prompt | get_llm() | parser
 
 def get_rewrite_chain():
-    return re_write_prompt | llm | parser
+    return re_write_prompt | get_llm() | parser
 
 # 1. For the Retriever
 class GradeDocuments(BaseModel):
@@ -28,6 +28,20 @@ class GradeDocuments(BaseModel):
         description="Documents are relevant to the user question, 'yes' or 'no'"
     )
 
+# 1b. For the batched Retriever grader
+class DocumentVerdict(BaseModel):
+    """Relevance verdict for one retrieved document."""
+    id: str = Field(description="The document id, exactly as given")
+    binary_score: str = Field(
+        description="Document is relevant to the user question, 'yes' or 'no'"
+    )
+
+class GradeDocumentBatch(BaseModel):
+    """Relevance verdicts for every document in the batch."""
+    verdicts: List[DocumentVerdict] = Field(
+        description="One verdict per document id"
+    )
+
 # 2. For the Hallucination Checker
 class GradeHallucinations(BaseModel):
     """Binary score for hallucination check in generation."""
@@ -42,6 +56,26 @@ class GradeAnswer(BaseModel):
         description="Answer addresses the user question, 'yes' or 'no'"
     )
 
-def get_grader_chain(): return grader_prompt | llm.with_structured_output(GradeDocuments)
-def get_hallucination_chain(): return hallucination_prompt | llm.with_structured_output(GradeHallucinations)
-def get_answer_grader_chain(): return answer_grader_prompt | llm.with_structured_output(GradeAnswer)
\ No newline at end of file
+def get_grader_chain(): return grader_prompt | get_llm().with_structured_output(GradeDocuments)
+def get_batch_grader_chain(): return batch_grader_prompt | get_llm().with_structured_output(GradeDocumentBatch)
+def get_hallucination_chain(): return hallucination_prompt | get_llm().with_structured_output(GradeHallucinations)
+def get_answer_grader_chain(): return answer_grader_prompt | get_llm().with_structured_output(GradeAnswer)
+
+def grading_batches(items: List[Tuple[str, str]], max_chars: int) -> List[List[Tuple[str, str]]]:
+    """
+    Splits (id, content) pairs into batches of at most max_chars of content,
+    keeping order. A document larger than the cap is graded on its own.
+    """
+    batches, current, size = [], [], 0
+    for item in items:
+        if current and size + len(item[1]) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += len(item[1])
+    if current:
+        batches.append(current)
+    return batches
+
+def format_grading_batch(batch: List[Tuple[str, str]]) -> str:
+    return "\n\n".join(f'<document id="{doc_id}">\n{content}\n</document>' for doc_id, content in batch)
@@ -0,0 +1,110 @@
+# core/context_packer.py
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from core.parent_store import render_with_page_anchors
+from utils.lazy import lazy_singleton
+
+GAP_MARKER = "[...]"
+
+ElementKey = Tuple[int, int]
+
+
+@lazy_singleton
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken fetches its BPE files on first use; offline we estimate
+        print(f"---TIKTOKEN UNAVAILABLE ({str(e)}), ESTIMATING TOKENS---")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def window_bounds(element_index: int, window: int) -> Tuple[int, int]:
+    return max(0, element_index - window), element_index + window
+
+
+def pack_windows(
+    hits: List[Document],
+    windows: List[List[dict]],
+    budget: int,
+    count: Callable[[str], int] = count_tokens,
+) -> List[dict]:
+    """
+    Packs the element window around each reranked hit into DocumentContext
+    dicts, one per parent, in rank order of each parent's best hit.
+
+    Hits are taken in rank order and each window is filled from the hit
+    outward, so under a tight budget the most relevant element always
+    goes in before its neighbours; within a split element, the hit chunk
+    goes first and its sibling chunks by distance from it. Overlapping windows of one parent are
+    merged (an element is only paid for once), non-adjacent runs are
+    separated by a [...] marker and page anchors are kept. Each document
+    carries its best hit's rerank score.
+    """
+    selected: Dict[str, Dict[ElementKey, dict]] = {}
+    sources: Dict[str, str] = {}
+    scores: Dict[str, Optional[float]] = {}
+    used = 0
+
+    for hit, rows in zip(hits, windows):
+        parent_id = hit.metadata.get("parent_id")
+        if not parent_id or not rows:
+            continue
+        center = hit.metadata.get("element_index", 0)
+        hit_chunk = hit.metadata.get("chunk_index", 0)
+        parent = selected.setdefault(parent_id, {})
+        sources.setdefault(parent_id, hit.metadata.get("source", "Unknown"))
+        scores.setdefault(parent_id, hit.metadata.get("rerank_score"))
+
+        exhausted = False
+        def distance(r: dict) -> Tuple[int, int, int, int]:
+            chunk_distance = abs(r["chunk_index"] - hit_chunk) if r["element_index"] == center else 0
+            return abs(r["element_index"] - center), r["element_index"], chunk_distance, r["chunk_index"]
+
+        for row in sorted(rows, key=distance):
+            key = (row["element_index"], row["chunk_index"])
+            if key in parent:
+                continue
+            cost = count(row["text"])
+            # Always keep at least one element, even if it alone is over budget
+            if used + cost > budget and used > 0:
+                exhausted = True
+                break
+            parent[key] = row
+            used += cost
+
+        if exhausted:
+            break
+
+    documents = []
+    for parent_id, rows in selected.items():
+        if not rows:
+            continue
+        ordered = [rows[key] for key in sorted(rows)]
+
+        elements = []
+        previous = None
+        for row in ordered:
+            if previous is not None and row["element_index"] > previous["element_index"] + 1:
+                elements.append({"text": GAP_MARKER, "page_number": previous["page_number"]})
+            elements.append(row)
+            previous = row
+
+        documents.append({
+            "content": render_with_page_anchors(elements),
+            "source": sources[parent_id],
+            "pages": sorted({row["page_number"] for row in ordered}),
+            "doc_id": parent_id,
+            "score": scores[parent_id],
+        })
+
+    return documents
@@ -0,0 +1,187 @@
+# core/embedding_cache.py
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+class SQLiteEmbeddingStore:
+    """
+    Disk-backed vector cache: key -> float32 blob, with LRU eviction once
+    the stored bytes exceed max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        self.entries, self.total_bytes = row
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update(
+                    (key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows
+                )
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            # Sizes of the rows being replaced keep the running totals exact
+            keys = list(items)
+            replaced = []
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                replaced.extend(size for size, in self._conn.execute(
+                    f"SELECT size FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self.entries += len(rows) - len(replaced)
+            self.total_bytes += sum(size for _, _, size, _ in rows) - sum(replaced)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least-recently-used rows until we are back under 90% of the cap
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_used ASC"
+        ):
+            if self.total_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self._conn.commit()
+        self.entries -= len(victims)
+        self.total_bytes -= freed
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Drop-in Embeddings wrapper that serves repeat texts from a persistent
+    cache keyed by (model, normalized text hash).
+    """
+
+    def __init__(self, underlying: Embeddings, store: SQLiteEmbeddingStore, model: Optional[str] = None):
+        self.underlying = underlying
+        self.store = store
+        self.model = model or getattr(underlying, "model", type(underlying).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _split(self, texts: List[str]):
+        keys = [self._key(t) for t in texts]
+        cached = self.store.get_many(list(dict.fromkeys(keys)))
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        miss_count = sum(1 for k in keys if k not in cached)
+        self.hits += len(keys) - miss_count
+        self.misses += miss_count
+        return keys, cached, missing
+
+    @staticmethod
+    def _merge(keys, cached, missing_keys, vectors):
+        cached.update(zip(missing_keys, vectors))
+        return [cached[k] for k in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split(texts)
+        vectors = self.underlying.embed_documents(list(missing.values())) if missing else []
+        self.store.put_many(dict(zip(missing.keys(), vectors)))
+        return self._merge(keys, cached, list(missing.keys()), vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, missing = self._split([text])
+        if not missing:
+            return cached[keys[0]]
+        vector = self.underlying.embed_query(text)
+        self.store.put_many({keys[0]: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = await asyncio.to_thread(self._split, texts)
+        vectors = await self.underlying.aembed_documents(list(missing.values())) if missing else []
+        await asyncio.to_thread(self.store.put_many, dict(zip(missing.keys(), vectors)))
+        return self._merge(keys, cached, list(missing.keys()), vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, cached, missing = await asyncio.to_thread(self._split, [text])
+        if not missing:
+            return cached[keys[0]]
+        vector = await self.underlying.aembed_query(text)
+        await asyncio.to_thread(self.store.put_many, {keys[0]: vector})
+        return vector
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self.store.entries,
+            "bytes": self.store.total_bytes,
+            "max_bytes": self.store.max_bytes,
+        }
@@ -1,8 +1,20 @@
-from langchain_openai import OpenAIEmbeddings
-from config import OPENROUTER_API_KEY
+from config import OPENROUTER_API_KEY, EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB
+from core.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+from utils.lazy import lazy_singleton
 
-embeddings = OpenAIEmbeddings(
-        api_key=OPENROUTER_API_KEY,
-        base_url="https://openrouter.ai/api/v1",
-        model="text-embedding-3-large"
-    )
+@lazy_singleton
+def get_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(
+            api_key=OPENROUTER_API_KEY,
+            base_url="https://openrouter.ai/api/v1",
+            model="text-embedding-3-large"
+        )
+
+    if EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            SQLiteEmbeddingStore(EMBEDDING_CACHE_PATH, max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+        )
+    return embeddings
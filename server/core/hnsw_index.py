@@ -0,0 +1,323 @@
+# core/hnsw_index.py
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from core.lexical_index import where_to_sql
+
+ID_BATCH = 500
+
+
+class HnswIndex:
+    """
+    Local vector backend: HNSW segments memory-mapped from disk, with chunk
+    text, metadata and filter columns in SQLite.
+
+    Each add() builds a small segment in RAM, saves it and from then on
+    only views it (mmap, read-only), so every worker process shares one
+    copy through the page cache instead of loading the index. Deletes drop
+    the SQLite row and leave a tombstone in the segment; merging segments
+    (automatic past max_segments, or compact()) rewrites live vectors only.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dtype: str = "f16",
+        connectivity: int = 16,
+        expansion_add: int = 128,
+        expansion_search: int = 64,
+        max_segments: int = 16,
+        exact_max: int = 4096,
+    ):
+        self.directory = directory
+        self.dtype = dtype
+        self.connectivity = connectivity
+        self.expansion_add = expansion_add
+        self.expansion_search = expansion_search
+        self.max_segments = max_segments
+        self.exact_max = exact_max
+        self.path = os.path.join(directory, "vectors.sqlite3")
+        self._lock = threading.Lock()
+        self._views: Dict[int, object] = {}
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS segments (
+                    segment INTEGER PRIMARY KEY AUTOINCREMENT,
+                    size INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS vectors (
+                    key INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chunk_id TEXT NOT NULL UNIQUE,
+                    segment INTEGER NOT NULL,
+                    parent_id TEXT NOT NULL,
+                    ticker TEXT,
+                    year INTEGER,
+                    period TEXT,
+                    text TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_vectors_parent ON vectors(parent_id);
+                CREATE INDEX IF NOT EXISTS idx_vectors_filing ON vectors(ticker, year, period);
+                CREATE INDEX IF NOT EXISTS idx_vectors_segment ON vectors(segment);
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.usearch")
+
+    # --- writes ---
+
+    def add(self, ids: List[str], vectors: Sequence[Sequence[float]], texts: List[str], metadatas: List[dict]):
+        """Upserts chunks by id as one new segment."""
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        path = None
+        try:
+            with self._connect() as conn:
+                # One writer at a time across processes
+                conn.execute("BEGIN IMMEDIATE")
+                self._remove(conn, ids)
+                segment = conn.execute("INSERT INTO segments (size) VALUES (?)", (len(ids),)).lastrowid
+                keys = [
+                    conn.execute(
+                        "INSERT INTO vectors (chunk_id, segment, parent_id, ticker, year, period, text, metadata) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            cid, segment, meta["parent_id"], meta.get("ticker"), meta.get("year"),
+                            meta.get("period"), text, json.dumps(meta),
+                        ),
+                    ).lastrowid
+                    for cid, text, meta in zip(ids, texts, metadatas)
+                ]
+                path = self._write_segment(segment, keys, vectors)
+        except Exception:
+            if path and os.path.exists(path):
+                os.remove(path)
+            raise
+
+        self._maybe_merge()
+
+    def delete(self, ids: List[str]):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._remove(conn, ids)
+
+    def _remove(self, conn, ids: List[str]):
+        for start in range(0, len(ids), ID_BATCH):
+            batch = ids[start:start + ID_BATCH]
+            conn.execute(f"DELETE FROM vectors WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+
+    def _new_index(self, ndim: int):
+        from usearch.index import Index
+
+        return Index(
+            ndim=ndim,
+            metric="cos",
+            dtype=self.dtype,
+            connectivity=self.connectivity,
+            expansion_add=self.expansion_add,
+            expansion_search=self.expansion_search,
+        )
+
+    def _write_segment(self, segment: int, keys: List[int], vectors: np.ndarray) -> str:
+        index = self._new_index(vectors.shape[1])
+        index.add(np.asarray(keys, dtype=np.uint64), vectors)
+        path = self._segment_path(segment)
+        # Readers only ever see complete files
+        index.save(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return path
+
+    def _maybe_merge(self):
+        with self._connect() as conn:
+            by_size = conn.execute(
+                "SELECT s.segment FROM segments s LEFT JOIN vectors v ON v.segment = s.segment "
+                "GROUP BY s.segment ORDER BY COUNT(v.key), s.segment"
+            ).fetchall()
+        if len(by_size) > self.max_segments:
+            # Merge the smaller half so segment sizes grow geometrically
+            self.merge([segment for segment, in by_size[:max(2, len(by_size) // 2)]])
+
+    def merge(self, segments: List[int]) -> int:
+        """Rewrites the live vectors of `segments` into one segment. Returns its size."""
+        views = self._refresh()
+        path = None
+        try:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have merged some of them already
+                present = {segment for segment, in conn.execute("SELECT segment FROM segments")}
+                segments = [s for s in segments if s in present and s in views]
+                if not segments:
+                    return 0
+                marks = ",".join("?" * len(segments))
+                by_segment: Dict[int, List[int]] = {}
+                for key, segment in conn.execute(
+                    f"SELECT key, segment FROM vectors WHERE segment IN ({marks}) ORDER BY key", segments
+                ):
+                    by_segment.setdefault(segment, []).append(key)
+
+                keys = [key for segment_keys in by_segment.values() for key in segment_keys]
+                if keys:
+                    vectors = np.vstack([
+                        self._vectors(views[segment], segment_keys) for segment, segment_keys in by_segment.items()
+                    ])
+                    merged = conn.execute("INSERT INTO segments (size) VALUES (?)", (len(keys),)).lastrowid
+                    path = self._write_segment(merged, keys, vectors)
+                    conn.execute(f"UPDATE vectors SET segment = ? WHERE segment IN ({marks})", [merged] + segments)
+                conn.execute(f"DELETE FROM segments WHERE segment IN ({marks})", segments)
+        except Exception:
+            if path and os.path.exists(path):
+                os.remove(path)
+            raise
+
+        # Processes still mapping the old files keep them until they refresh
+        with self._lock:
+            for segment in segments:
+                self._views.pop(segment, None)
+        for segment in segments:
+            os.remove(self._segment_path(segment))
+        return len(keys)
+
+    def compact(self) -> int:
+        """Merges every segment into one and drops tombstones. Returns the live vector count."""
+        with self._connect() as conn:
+            segments = [segment for segment, in conn.execute("SELECT segment FROM segments")]
+        return self.merge(segments)
+
+    # --- reads ---
+
+    def _refresh(self) -> Dict[int, object]:
+        """Maps newly committed segments and drops merged ones."""
+        from usearch.index import Index
+
+        for _ in range(3):
+            with self._connect() as conn:
+                live = [segment for segment, in conn.execute("SELECT segment FROM segments")]
+            with self._lock:
+                for segment in set(self._views) - set(live):
+                    del self._views[segment]
+                try:
+                    for segment in live:
+                        if segment not in self._views:
+                            path = self._segment_path(segment)
+                            if not os.path.exists(path):
+                                raise FileNotFoundError(path)
+                            view = Index.restore(path, view=True)
+                            view.expansion_search = self.expansion_search
+                            self._views[segment] = view
+                except FileNotFoundError:
+                    # Merged away between the listing and the mmap; list again
+                    continue
+                return dict(self._views)
+        raise RuntimeError("HNSW segments kept changing while refreshing")
+
+    @staticmethod
+    def _vectors(view, keys: List[int]) -> np.ndarray:
+        return np.vstack(view.get(np.asarray(keys, dtype=np.uint64), dtype=np.float32))
+
+    def similarity_search_by_vector(
+        self, vector: Sequence[float], k: int = 10, where: Optional[dict] = None
+    ) -> List[Document]:
+        query = np.asarray(vector, dtype=np.float32)
+        views = self._refresh()
+        if not views:
+            return []
+        condition, params = where_to_sql(where)
+
+        with self._connect() as conn:
+            if where:
+                matching = conn.execute(f"SELECT COUNT(*) FROM vectors c WHERE {condition}", params).fetchone()[0]
+                if not matching:
+                    return []
+                # A selective filter (one filing, one ticker) is cheaper and exact as a scan
+                if matching <= self.exact_max:
+                    return self._exact_search(conn, views, query, k, condition, params)
+
+            total = sum(len(view) for view in views.values())
+            fetch = min(k * 4, total)
+            while True:
+                candidates = sorted(
+                    (float(distance), int(key))
+                    for view in views.values()
+                    for key, distance in zip(*self._search_view(view, query, fetch))
+                )
+                rows = self._rows(conn, [key for _, key in candidates], condition, params)
+                ranked = [rows[key] for _, key in candidates if key in rows][:k]
+                # Tombstones and filtered-out hits can leave us short; widen and retry
+                if len(ranked) >= k or fetch >= total:
+                    return ranked
+                fetch = min(fetch * 4, total)
+
+    @staticmethod
+    def _search_view(view, query: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        matches = view.search(query, count=min(count, len(view)))
+        return matches.keys, matches.distances
+
+    def _exact_search(self, conn, views, query, k, condition, params) -> List[Document]:
+        by_segment: Dict[int, List[int]] = {}
+        for key, segment in conn.execute(f"SELECT c.key, c.segment FROM vectors c WHERE {condition}", params):
+            by_segment.setdefault(segment, []).append(key)
+
+        keys, matrices = [], []
+        for segment, segment_keys in by_segment.items():
+            if segment in views:
+                keys.extend(segment_keys)
+                matrices.append(self._vectors(views[segment], segment_keys))
+        if not keys:
+            return []
+
+        matrix = np.vstack(matrices)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        distances = 1.0 - (matrix @ query) / np.maximum(norms, 1e-12)
+        top = [keys[i] for i in np.argsort(distances, kind="stable")[:k]]
+        rows = self._rows(conn, top, "1", [])
+        return [rows[key] for key in top if key in rows]
+
+    def _rows(self, conn, keys: List[int], condition: str, params: list) -> Dict[int, Document]:
+        rows: Dict[int, Document] = {}
+        for start in range(0, len(keys), ID_BATCH):
+            batch = keys[start:start + ID_BATCH]
+            for key, cid, text, meta in conn.execute(
+                f"SELECT c.key, c.chunk_id, c.text, c.metadata FROM vectors c "
+                f"WHERE c.key IN ({','.join('?' * len(batch))}) AND {condition}",
+                batch + params,
+            ):
+                rows[key] = Document(page_content=text, metadata=json.loads(meta), id=cid)
+        return rows
+
+    def get(
+        self,
+        where: Optional[dict] = None,
+        include: Sequence[str] = ("metadatas", "documents"),
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> dict:
+        """Chroma-style get: {"ids", "documents", "metadatas"} in insertion order."""
+        condition, params = where_to_sql(where)
+        sql = f"SELECT c.chunk_id, c.text, c.metadata FROM vectors c WHERE {condition} ORDER BY c.key"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limit, offset or 0]
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return {
+            "ids": [cid for cid, _, _ in rows],
+            "documents": [text for _, text, _ in rows] if "documents" in include else None,
+            "metadatas": [json.loads(meta) for _, _, meta in rows] if "metadatas" in include else None,
+        }
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
@@ -0,0 +1,139 @@
+# core/ingest_jobs.py
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from config import INGEST_WORKERS, INGEST_JOB_HISTORY
+from utils.file import delete_temp_file
+
+
+class IngestJobQueue:
+    """
+    In-process ingestion queue. A fixed pool of asyncio workers pulls jobs
+    and records stage progress so clients can poll for the result.
+    No external broker; job state lives only as long as the process.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS, history: int = INGEST_JOB_HISTORY):
+        self.num_workers = max(1, workers)
+        self.history = history
+        self.jobs: Dict[str, dict] = {}
+        self._in_flight: Dict[str, str] = {}  # content_hash -> queued/running job_id
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._loop = None
+
+    def start(self):
+        """Starts the worker pool on the running event loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._workers = [
+            loop.create_task(self._worker(), name=f"ingest-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+        # Jobs no worker picked up still own their spooled uploads
+        while self._queue is not None and not self._queue.empty():
+            job_id, _, kwargs, spool_paths = self._queue.get_nowait()
+            self._update(job_id, status="failed", stage="failed", error="cancelled")
+            self._release(job_id, kwargs, spool_paths)
+
+    def _new_job(self, filename: Optional[str], status: str, filenames: Optional[List[str]] = None) -> dict:
+        now = time.time()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "filename": filename,
+            "filenames": filenames if filenames is not None else [filename],
+            "status": status,     # queued | running | completed | failed
+            "stage": status,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.jobs[job["job_id"]] = job
+        self._prune()
+        return job
+
+    def submit(self, run: Callable[..., Awaitable[dict]], spool_paths: Sequence[str] = (), **kwargs: Any) -> dict:
+        """
+        Queues `run(report=..., **kwargs)` and returns the job record.
+        A `content_hash` kwarg marks the job in flight until it finishes;
+        spool_paths are deleted once it ends, however it ends.
+        """
+        self.start()
+        filenames = [item["filename"] for item in kwargs["items"]] if "items" in kwargs else None
+        job = self._new_job(kwargs.get("filename"), "queued", filenames)
+        if kwargs.get("content_hash"):
+            self._in_flight[kwargs["content_hash"]] = job["job_id"]
+        self._queue.put_nowait((job["job_id"], run, kwargs, list(spool_paths)))
+        return job
+
+    def in_flight(self, content_hash: str) -> Optional[dict]:
+        """The queued or running job already ingesting these bytes, if any."""
+        job_id = self._in_flight.get(content_hash)
+        return self.jobs.get(job_id) if job_id else None
+
+    def record_completed(self, filename: str, result: dict) -> dict:
+        """Job record for work that finished without queueing (e.g. dedup hits)."""
+        job = self._new_job(filename, "completed")
+        job["result"] = result
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.jobs.get(job_id)
+
+    def _update(self, job_id: str, **fields):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.update(fields, updated_at=time.time())
+
+    def _prune(self):
+        # Forget the oldest finished jobs once history is full
+        finished = [
+            j for j in self.jobs.values() if j["status"] in ("completed", "failed")
+        ]
+        overflow = len(self.jobs) - self.history
+        for job in sorted(finished, key=lambda j: j["updated_at"])[:max(0, overflow)]:
+            del self.jobs[job["job_id"]]
+
+    def _release(self, job_id: str, kwargs: dict, spool_paths: List[str]):
+        if self._in_flight.get(kwargs.get("content_hash")) == job_id:
+            del self._in_flight[kwargs["content_hash"]]
+        for path in spool_paths:
+            delete_temp_file(path)
+
+    async def _worker(self):
+        while True:
+            job_id, run, kwargs, spool_paths = await self._queue.get()
+
+            def report(stage: str, progress: Dict[str, Any], _job_id=job_id):
+                self._update(_job_id, stage=stage, progress=progress)
+
+            try:
+                self._update(job_id, status="running")
+                result = await run(report=report, **kwargs)
+                self._update(job_id, status="completed", stage="completed", result=result)
+            except asyncio.CancelledError:
+                self._update(job_id, status="failed", stage="failed", error="cancelled")
+                raise
+            except Exception as e:
+                print(f"CRITICAL ERROR in ingest job {job_id}: {str(e)}")
+                self._update(job_id, status="failed", stage="failed", error=str(e))
+            finally:
+                self._release(job_id, kwargs, spool_paths)
+                self._queue.task_done()
+
+
+ingest_jobs = IngestJobQueue()
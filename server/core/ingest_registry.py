@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional, Set
+from config import INGEST_REGISTRY_PATH
+from utils.lazy import lazy_singleton
+
+
+def content_hasher(settings: dict):
+    """
+    sha256 pre-seeded with the partition settings, so the same bytes
+    ingested with different settings get a different fingerprint.
+    Feed the file bytes with .update().
+    """
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return hasher
+
+
+def compute_content_hash(file_bytes: bytes, settings: dict) -> str:
+    hasher = content_hasher(settings)
+    hasher.update(file_bytes)
+    return hasher.hexdigest()
+
+
+class IngestRegistry:
+    """
+    Local SQLite registry of ingested filings, keyed by content hash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS filings (
+                    content_hash TEXT PRIMARY KEY,
+                    parent_id TEXT NOT NULL,
+                    filename TEXT,
+                    ticker TEXT,
+                    year INTEGER,
+                    period TEXT,
+                    chunks INTEGER NOT NULL,
+                    ingested_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM filings WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def put(self, content_hash: str, record: dict):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO filings
+                    (content_hash, parent_id, filename, ticker, year, period, chunks, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    content_hash,
+                    record["parent_id"],
+                    record.get("filename"),
+                    record.get("ticker"),
+                    record.get("year"),
+                    record.get("period"),
+                    record["chunks"],
+                    time.time(),
+                ),
+            )
+
+    def tickers(self) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT ticker FROM filings WHERE ticker IS NOT NULL AND ticker != 'UNKNOWN'"
+            ).fetchall()
+        return {row["ticker"] for row in rows}
+
+    def parent_ids_matching(self, fiscal_info: dict) -> List[str]:
+        """
+        Parent ids of the filings a ticker/year/period filter selects;
+        an empty filter selects every filing.
+        """
+        clauses, params = [], []
+        for field in ("ticker", "year", "period"):
+            values = fiscal_info.get(field) or []
+            if values:
+                clauses.append(f"{field} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT parent_id FROM filings WHERE {' AND '.join(clauses) or '1'} ORDER BY parent_id",
+                params,
+            ).fetchall()
+        return [row["parent_id"] for row in rows]
+
+    def retrieval_scope(self, fiscal_info: dict) -> List[str]:
+        """
+        Parent ids retrieval can draw on under a filter: the filings it
+        selects, or every filing when it selects none (retrieval then
+        falls back to the whole corpus).
+        """
+        return self.parent_ids_matching(fiscal_info) or self.parent_ids_matching({})
+
+
+# Opened on first use, not at import
+@lazy_singleton
+def get_ingest_registry() -> IngestRegistry:
+    return IngestRegistry(INGEST_REGISTRY_PATH)
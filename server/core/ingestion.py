@@ -0,0 +1,512 @@
+# core/ingestion.py
+import asyncio
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import (
+    INGEST_EMBED_BATCH_SIZE,
+    INGEST_BATCH_WRITE_SIZE,
+    INGEST_BATCH_MAX_WAIT_MS,
+    INGEST_PIPELINE_DEPTH,
+    PARTITION_MODE,
+    PARTITION_SHARD_PAGES,
+    PARTITION_WORKERS,
+    CHUNK_MAX_CHARS,
+    CHUNK_OVERLAP,
+)
+from core.retriever import delete_parent
+from core.vectorstore import get_vector_access
+from core.ingest_registry import get_ingest_registry
+from core.parent_store import get_parent_store, build_parent_document, element_rows
+from core.lexical_index import get_lexical_index, chunk_id
+from core.answer_cache import get_answer_cache
+from utils.extractors.tenq_metadata import regex_extract_tenq_metadata, llm_extract_tenq_metadata
+from utils.vision.financial_image import summarize_financial_images
+from utils.pdf_partition import partition_pdf_sharded
+from utils.file import delete_temp_file
+from utils.text_splitter import split_text, split_html_table
+
+PARTITION_SETTINGS = {
+    "strategy": "auto",
+    "extract_images_in_pdf": True,
+    "infer_table_structure": True,
+    "chunking_strategy": None,
+}
+
+# Part of the content fingerprint: changing these re-ingests everything
+INGEST_SETTINGS = {
+    **PARTITION_SETTINGS,
+    "chunk_max_chars": CHUNK_MAX_CHARS,
+    "chunk_overlap": CHUNK_OVERLAP,
+}
+
+# report(stage, progress) -> None
+StageReporter = Callable[[str, Dict[str, Any]], None]
+
+
+def _no_report(stage: str, progress: Dict[str, Any]):
+    pass
+
+
+def duplicate_result(existing: dict) -> dict:
+    """Response for a filing that is already in the registry."""
+    return {
+        "status": "duplicate",
+        "parent_id": existing["parent_id"],
+        "ticker": existing["ticker"],
+        "year": existing["year"],
+        "period": existing["period"],
+        "used_llm_fallback": False,
+        "chunks": existing["chunks"],
+    }
+
+
+def partition_pdf(**kwargs):
+    """unstructured's partition_pdf, imported on first use: the import alone takes seconds."""
+    from unstructured.partition.pdf import partition_pdf as _partition_pdf
+
+    return _partition_pdf(**kwargs)
+
+
+def partition_document(pdf_path: str):
+    """
+    CPU-bound: call through asyncio.to_thread from async code.
+    In "sharded" mode large PDFs are split into page ranges and
+    partitioned across a process pool.
+    """
+    if PARTITION_MODE == "sharded":
+        return partition_pdf_sharded(
+            pdf_path,
+            PARTITION_SETTINGS,
+            pages_per_shard=PARTITION_SHARD_PAGES,
+            workers=PARTITION_WORKERS,
+        )
+    return partition_pdf(filename=pdf_path, **PARTITION_SETTINGS)
+
+
+async def extract_filing_metadata(elements) -> dict:
+    """
+    Regex-first ticker/year/period extraction with structured LLM fallback.
+    """
+    # --------------------------------------------------
+    # 1. Extract cover text safely
+    # --------------------------------------------------
+    cover_text = "\n".join(
+        el.text for el in elements[:20]
+        if hasattr(el, "text") and el.text
+    )[:3000]
+
+    # --------------------------------------------------
+    # 2. Regex-first metadata extraction
+    # --------------------------------------------------
+    regex_metadata = regex_extract_tenq_metadata(cover_text)
+    ticker = regex_metadata.ticker
+    year = regex_metadata.year
+    period = regex_metadata.period
+    used_llm = False
+
+    # --------------------------------------------------
+    # 3. Structured LLM fallback (ONLY if needed)
+    # --------------------------------------------------
+    if ticker is None or year is None or period is None:
+        used_llm = True
+        llm_metadata = await llm_extract_tenq_metadata(cover_text)
+
+        if ticker is None:
+            ticker = llm_metadata.ticker
+        if year is None:
+            year = llm_metadata.year
+        if period is None:
+            period = llm_metadata.period
+
+
+    ticker = ticker.strip().upper() if isinstance(ticker, str) else "UNKNOWN"
+
+    metadata_complete = (
+        ticker != "UNKNOWN" and
+        year is not None and
+        period is not None
+    )
+
+    return {
+        "ticker": ticker,
+        "year": year,
+        "period": period,
+        "used_llm_fallback": used_llm,
+        "metadata_complete": metadata_complete,
+    }
+
+
+async def build_payload(
+    elements,
+    parent_id: str,
+    filename: str,
+    filing: dict,
+) -> Tuple[List[str], List[dict]]:
+    """
+    Turns partitioned elements into (texts, metadatas) for the vector store.
+    Image elements are summarized concurrently and slotted back in order.
+    """
+    # --------------------------------------------------
+    # 1. Summarize images concurrently (bounded)
+    # --------------------------------------------------
+    image_indices = [
+        idx for idx, el in enumerate(elements)
+        if el.category == "Image" and el.metadata.image_base64
+    ]
+    image_summaries = await summarize_financial_images(
+        [elements[idx].metadata.image_base64 for idx in image_indices]
+    )
+    summaries_by_index = dict(zip(image_indices, image_summaries))
+
+    # --------------------------------------------------
+    # 2. Build vectorstore payload (modality-aware)
+    # --------------------------------------------------
+    texts = []
+    metadatas = []
+
+    for idx, el in enumerate(elements):
+        base_meta = {
+            "parent_id": parent_id,
+            "ticker": filing["ticker"],
+            "year": filing["year"],
+            "period": filing["period"],
+            "metadata_complete": filing["metadata_complete"],
+            "source": filename,
+            "page_number": el.metadata.page_number or 1,
+            "element_index": idx,
+        }
+
+        # -------- IMAGE --------
+        if idx in summaries_by_index:
+            # None = pre-filtered (too small to be a chart)
+            if summaries_by_index[idx] is None:
+                continue
+            texts.append(summaries_by_index[idx])
+            metadatas.append({
+                **base_meta,
+                "modality": "image",
+                "type": "chart",
+            })
+
+        # -------- TABLE --------
+        elif el.category == "Table":
+            table_html = el.metadata.text_as_html or el.text
+            texts.append(table_html)
+            metadatas.append({
+                **base_meta,
+                "modality": "table",
+                "type": "financial_table",
+            })
+
+        # -------- TEXT --------
+        elif hasattr(el, "text") and el.text:
+            texts.append(el.text)
+            metadatas.append({
+                **base_meta,
+                "modality": "text",
+                "type": "narrative",
+            })
+
+    if not texts:
+        raise ValueError("No ingestable content extracted from 10-Q")
+
+    return texts, metadatas
+
+
+def chunk_payload(
+    texts: List[str],
+    metadatas: List[dict],
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+) -> Tuple[List[str], List[dict]]:
+    """
+    Splits oversized elements into bounded child chunks (row-aware for
+    HTML tables). Children keep the parent element_index and add a
+    chunk_index, so (element_index, chunk_index) preserves reading order.
+    """
+    chunk_texts = []
+    chunk_metadatas = []
+
+    for text, meta in zip(texts, metadatas):
+        if len(text) <= max_chars:
+            pieces = [text]
+        elif meta["modality"] == "table":
+            pieces = split_html_table(text, max_chars)
+        else:
+            pieces = split_text(text, chunk_size=max_chars, chunk_overlap=overlap)
+
+        for chunk_index, piece in enumerate(pieces):
+            chunk_texts.append(piece)
+            chunk_metadatas.append({**meta, "chunk_index": chunk_index})
+
+    return chunk_texts, chunk_metadatas
+
+
+async def persist_payload(
+    texts: List[str],
+    metadatas: List[dict],
+    report: StageReporter = _no_report,
+    batch_size: int = INGEST_EMBED_BATCH_SIZE,
+):
+    """
+    Embeds and writes the payload in batches; each batch is embedded on
+    the event loop and upserted through the vector store thread pool.
+    Chunk ids are deterministic so the BM25 index can refer to the same chunks.
+    """
+    total = len(texts)
+    for start in range(0, total, batch_size):
+        batch_metadatas = metadatas[start:start + batch_size]
+        await get_vector_access().add_texts(
+            texts=texts[start:start + batch_size],
+            metadatas=batch_metadatas,
+            ids=[chunk_id(m) for m in batch_metadatas],
+        )
+        report("embedding", {"done": min(start + batch_size, total), "total": total})
+
+
+async def prepare_pdf(
+    pdf_path: str,
+    filename: str,
+    report: StageReporter = _no_report,
+    cleanup: bool = True,
+) -> dict:
+    """
+    CPU/LLM half of the pipeline: partition -> metadata -> summarize -> chunk.
+    With cleanup=True the PDF at pdf_path is deleted once partitioned.
+    """
+    report("partitioning", {})
+    try:
+        # partition_pdf is synchronous; keep it off the event loop
+        elements = await asyncio.to_thread(partition_document, pdf_path)
+    finally:
+        if cleanup:
+            delete_temp_file(pdf_path)
+
+    report("extracting_metadata", {"elements": len(elements)})
+    filing = await extract_filing_metadata(elements)
+
+    report("summarizing", {"elements": len(elements)})
+    parent_id = str(uuid.uuid4())
+    texts, metadatas = await build_payload(elements, parent_id, filename, filing)
+
+    report("chunking", {"elements": len(texts)})
+    texts, metadatas = chunk_payload(texts, metadatas, CHUNK_MAX_CHARS, CHUNK_OVERLAP)
+
+    return {
+        "parent_id": parent_id,
+        "filing": filing,
+        "texts": texts,
+        "metadatas": metadatas,
+    }
+
+
+def write_local_stores(prepared: dict, filename: str, content_hash: str):
+    """
+    Indexes the chunks for BM25, stores the materialized parent, records
+    the filing in the registry and prunes answers cached for the old
+    filing sets (blocking SQLite writes).
+    """
+    filing = prepared["filing"]
+    parent_id = prepared["parent_id"]
+
+    # Lexical side of hybrid search, keyed by the same chunk ids as Chroma
+    get_lexical_index().add(
+        [chunk_id(m) for m in prepared["metadatas"]], prepared["texts"], prepared["metadatas"]
+    )
+
+    # Materialize the anchored parent once; retrieval only does a lookup.
+    # Element rows back the windowed context packer.
+    get_parent_store().put(
+        build_parent_document(parent_id, prepared["texts"], prepared["metadatas"])
+    )
+    get_parent_store().put_elements(parent_id, element_rows(prepared["texts"], prepared["metadatas"]))
+
+    get_ingest_registry().put(content_hash, {
+        "parent_id": parent_id,
+        "filename": filename,
+        "ticker": filing["ticker"],
+        "year": filing["year"],
+        "period": filing["period"],
+        "chunks": len(prepared["texts"]),
+    })
+
+    # Cached answers whose filing set just changed can never be served again
+    get_answer_cache().prune_scopes(get_ingest_registry().retrieval_scope)
+
+
+async def finalize_ingest(
+    prepared: dict,
+    filename: str,
+    content_hash: str,
+    existing: Optional[dict] = None,
+) -> dict:
+    """
+    Runs after the payload is persisted: drops the copy being replaced,
+    indexes the chunks for BM25, stores the materialized parent, records
+    the filing in the registry and builds the response.
+    """
+    filing = prepared["filing"]
+    parent_id = prepared["parent_id"]
+    chunks = len(prepared["texts"])
+
+    # Forced re-ingest replaces the previous copy instead of doubling hits
+    if existing:
+        await delete_parent(existing["parent_id"])
+
+    await asyncio.to_thread(write_local_stores, prepared, filename, content_hash)
+
+    return {
+        "status": "success",
+        "parent_id": parent_id,
+        "ticker": filing["ticker"],
+        "year": filing["year"],
+        "period": filing["period"],
+        "used_llm_fallback": filing["used_llm_fallback"],
+        "chunks": chunks,
+    }
+
+
+async def ingest_pdf(
+    pdf_path: str,
+    filename: str,
+    content_hash: str,
+    existing: Optional[dict] = None,
+    report: StageReporter = _no_report,
+    cleanup: bool = True,
+) -> dict:
+    """
+    Full 10-Q pipeline: partition -> metadata -> summarize -> chunk -> embed/persist.
+    `existing` is the registry record being replaced on a forced re-ingest.
+    """
+    prepared = await prepare_pdf(pdf_path, filename, report=report, cleanup=cleanup)
+
+    report("embedding", {"done": 0, "total": len(prepared["texts"])})
+    try:
+        await persist_payload(prepared["texts"], prepared["metadatas"], report=report)
+    except Exception:
+        # Drop the batches that did get written; nothing registers them
+        await delete_parent(prepared["parent_id"])
+        raise
+
+    return await finalize_ingest(prepared, filename, content_hash, existing)
+
+
+async def ingest_batch(
+    items: List[dict],
+    force: bool = False,
+    report: StageReporter = _no_report,
+    write_batch_size: int = INGEST_BATCH_WRITE_SIZE,
+    max_wait_ms: float = INGEST_BATCH_MAX_WAIT_MS,
+) -> List[dict]:
+    """
+    Pipelined multi-file ingestion. Each item is a dict with pdf_path,
+    filename, content_hash and optionally cleanup (default True).
+
+    A producer prepares files one after another while a consumer writes
+    finished payloads to Chroma, so partitioning file N+1 overlaps
+    embedding file N. Payloads from several files are buffered into
+    add_texts batches of about write_batch_size texts; a partial batch is
+    written once its first file has waited max_wait_ms.
+    Returns one result per item, in input order, each tagged with its filename.
+    """
+    results: List[Optional[dict]] = [None] * len(items)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=INGEST_PIPELINE_DEPTH)
+
+    # Registry hits are answered up front; the same content twice in one
+    # batch is ingested once and the repeats point at the first copy
+    todo: List[int] = []
+    existing_by_index: Dict[int, dict] = {}
+    first_by_hash: Dict[str, int] = {}
+    repeats: Dict[int, int] = {}
+    for i, item in enumerate(items):
+        existing = await asyncio.to_thread(get_ingest_registry().get, item["content_hash"])
+        if existing and not force:
+            results[i] = duplicate_result(existing)
+        elif item["content_hash"] in first_by_hash:
+            repeats[i] = first_by_hash[item["content_hash"]]
+        else:
+            first_by_hash[item["content_hash"]] = i
+            if existing:
+                existing_by_index[i] = existing
+            todo.append(i)
+            continue
+
+        if item.get("cleanup", True):
+            delete_temp_file(item["pdf_path"])
+
+    async def produce():
+        for n, i in enumerate(todo):
+            item = items[i]
+            report("preparing", {"file": n + 1, "files": len(todo), "filename": item["filename"]})
+            try:
+                prepared = await prepare_pdf(
+                    item["pdf_path"],
+                    item["filename"],
+                    cleanup=item.get("cleanup", True),
+                )
+                await queue.put((i, prepared))
+            except Exception as e:
+                print(f"CRITICAL ERROR preparing {item['filename']}: {str(e)}")
+                results[i] = {"status": "failed", "error": str(e)}
+        await queue.put(None)
+
+    async def flush(pending: List[Tuple[int, dict]]):
+        texts = [t for _, p in pending for t in p["texts"]]
+        metadatas = [m for _, p in pending for m in p["metadatas"]]
+        report("embedding", {"files": [items[i]["filename"] for i, _ in pending], "texts": len(texts)})
+        try:
+            await persist_payload(texts, metadatas, batch_size=write_batch_size)
+        except Exception as e:
+            print(f"CRITICAL ERROR persisting batch: {str(e)}")
+            for i, prepared in pending:
+                results[i] = {"status": "failed", "error": str(e)}
+                # Drop the chunks that did get written; nothing registers them
+                try:
+                    await delete_parent(prepared["parent_id"])
+                except Exception as cleanup_error:
+                    print(f"CRITICAL ERROR rolling back {prepared['parent_id']}: {str(cleanup_error)}")
+            return
+
+        for i, prepared in pending:
+            item = items[i]
+            try:
+                results[i] = await finalize_ingest(
+                    prepared, item["filename"], item["content_hash"], existing_by_index.get(i)
+                )
+            except Exception as e:
+                print(f"CRITICAL ERROR finalizing {item['filename']}: {str(e)}")
+                results[i] = {"status": "failed", "error": str(e)}
+
+    async def consume():
+        loop = asyncio.get_running_loop()
+        pending: List[Tuple[int, dict]] = []
+        buffered = 0
+        deadline = 0.0
+        while True:
+            try:
+                timeout = max(0.0, deadline - loop.time()) if pending else None
+                entry = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Preparation is the bottleneck; don't hold finished files back
+                await flush(pending)
+                pending, buffered = [], 0
+                continue
+            if entry is None:
+                break
+            if not pending:
+                deadline = loop.time() + max_wait_ms / 1000
+            pending.append(entry)
+            buffered += len(entry[1]["texts"])
+            if buffered >= write_batch_size:
+                await flush(pending)
+                pending, buffered = [], 0
+        if pending:
+            await flush(pending)
+
+    await asyncio.gather(produce(), consume())
+
+    for i, first in repeats.items():
+        result = results[first]
+        results[i] = {**result, "status": "duplicate"} if result["status"] == "success" else result
+
+    return [{"filename": item["filename"], **result} for item, result in zip(items, results)]
@@ -0,0 +1,253 @@
+# core/lexical_index.py
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from config import LEXICAL_INDEX_PATH, LEXICAL_MAX_DF_RATIO
+from utils.lazy import lazy_singleton
+
+TAG_RE = re.compile(r"<[^>]+>")
+# Keeps tickers, years, "10-q" style ids and decimals as single tokens
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+# Question words and function words; they match most chunks and carry no signal
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been before being below between both but by
+can could did do does doing during each few for from had has have having how i if in into is it its
+itself me more most my no nor not of off on once only or other our out over own same she should so
+some such than that the their them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+""".split())
+
+# Columns a Chroma-style `where` clause may filter on
+FILTER_COLUMNS = ("parent_id", "ticker", "year", "period")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(TAG_RE.sub(" ", text or "").lower()) if t not in STOPWORDS]
+
+
+def chunk_id(metadata: dict) -> str:
+    """Deterministic chunk id shared by the vector store and the BM25 index."""
+    return f"{metadata['parent_id']}:{metadata.get('element_index', 0)}:{metadata.get('chunk_index', 0)}"
+
+
+def where_to_sql(where: Optional[dict]) -> Tuple[str, list]:
+    """
+    Translates the subset of Chroma `where` syntax the retriever emits
+    (equality, $in, $and) into a SQL condition on the chunks table.
+    """
+    if not where:
+        return "1", []
+
+    if "$and" in where:
+        parts = [where_to_sql(clause) for clause in where["$and"]]
+        return " AND ".join(f"({sql})" for sql, _ in parts), [p for _, params in parts for p in params]
+
+    (field, value), = where.items()
+    if field not in FILTER_COLUMNS:
+        raise ValueError(f"Unsupported lexical filter field: {field}")
+    if isinstance(value, dict) and "$in" in value:
+        values = list(value["$in"])
+        return f"c.{field} IN ({','.join('?' * len(values))})", values
+    if isinstance(value, dict) and "$eq" in value:
+        value = value["$eq"]
+    return f"c.{field} = ?", [value]
+
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index over chunk text, persisted in SQLite.
+    Chunks are added at ingest and dropped per parent on delete.
+
+    Writes go through one connection under a lock; searches use a read
+    connection per thread (WAL), so queries never wait on ingest. Scoring
+    runs in SQL and only the top k rows come back to Python.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75, max_df_ratio: float = 0.5):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                parent_id TEXT NOT NULL,
+                ticker TEXT,
+                year INTEGER,
+                period TEXT,
+                length INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_parent ON chunks(parent_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings(chunk_id);
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, doc_count, total_length) VALUES (0, 0, 0);
+            -- Document frequencies, kept up to date on write instead of counted per query
+            CREATE TABLE IF NOT EXISTS df (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        with self._lock:
+            # Re-adding a chunk id replaces it
+            self._remove(ids)
+            added_length = 0
+            df: Counter = Counter()
+            for cid, text, meta in zip(ids, texts, metadatas):
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                added_length += length
+                df.update(terms.keys())
+                self._conn.execute(
+                    "INSERT INTO chunks (chunk_id, parent_id, ticker, year, period, length, text, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        cid, meta["parent_id"], meta.get("ticker"), meta.get("year"), meta.get("period"),
+                        length, text, json.dumps(meta),
+                    ),
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, cid, tf) for term, tf in terms.items()],
+                )
+            self._conn.executemany(
+                "INSERT INTO df (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                df.items(),
+            )
+            self._conn.execute(
+                "UPDATE stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 0",
+                (len(ids), added_length),
+            )
+            self._conn.commit()
+
+    def delete_parent(self, parent_id: str) -> int:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE parent_id = ?", (parent_id,)
+            )]
+            self._remove(ids)
+            self._conn.commit()
+        return len(ids)
+
+    def _remove(self, ids: List[str]):
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            marks = ",".join("?" * len(batch))
+            count, length = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks WHERE chunk_id IN ({marks})", batch
+            ).fetchone()
+            if not count:
+                continue
+            removed = self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE chunk_id IN ({marks}) GROUP BY term", batch
+            ).fetchall()
+            self._conn.executemany("UPDATE df SET df = df - ? WHERE term = ?", [(n, term) for term, n in removed])
+            self._conn.execute("DELETE FROM df WHERE df <= 0")
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({marks})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({marks})", batch)
+            self._conn.execute(
+                "UPDATE stats SET doc_count = doc_count - ?, total_length = total_length - ? WHERE id = 0",
+                (count, length),
+            )
+
+    def search(self, query: str, k: int = 10, where: Optional[dict] = None) -> List[Document]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        conn = self._reader()
+        doc_count, total_length = conn.execute(
+            "SELECT doc_count, total_length FROM stats WHERE id = 0"
+        ).fetchone()
+        if not doc_count:
+            return []
+        df = dict(conn.execute(
+            f"SELECT term, df FROM df WHERE term IN ({','.join('?' * len(terms))})", terms
+        ).fetchall())
+        if not df:
+            return []
+
+        # Terms in most chunks add little score but many postings; keep the
+        # rarest one if every term is that common
+        selective = {t: n for t, n in df.items() if n <= self.max_df_ratio * doc_count}
+        if not selective:
+            rarest = min(df, key=df.get)
+            selective = {rarest: df[rarest]}
+
+        idf = {t: math.log(1 + (doc_count - n + 0.5) / (n + 0.5)) for t, n in selective.items()}
+        condition, params = where_to_sql(where)
+        rows = conn.execute(
+            f"WITH q(term, idf) AS (VALUES {', '.join(['(?, ?)'] * len(idf))}) "
+            f"SELECT c.chunk_id, c.text, c.metadata, "
+            f"SUM(q.idf * p.tf * ? / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score "
+            f"FROM q JOIN postings p ON p.term = q.term "
+            f"JOIN chunks c ON c.chunk_id = p.chunk_id "
+            f"WHERE {condition} "
+            f"GROUP BY c.chunk_id ORDER BY score DESC LIMIT ?",
+            [v for item in idf.items() for v in item]
+            + [self.k1 + 1, self.k1, self.b, self.b, total_length / doc_count]
+            + params + [k],
+        ).fetchall()
+
+        return [
+            Document(page_content=text, metadata=json.loads(meta), id=cid)
+            for cid, text, meta, _ in rows
+        ]
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT doc_count FROM stats WHERE id = 0").fetchone()[0]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = 60) -> List[Document]:
+    """
+    Merges ranked lists by sum of 1 / (k + rank). Documents are matched on
+    their chunk id, so the same chunk from both retrievers is counted once.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.id or chunk_id(doc.metadata)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+# Opened on first use, not at import
+@lazy_singleton
+def get_lexical_index() -> BM25Index:
+    return BM25Index(LEXICAL_INDEX_PATH, max_df_ratio=LEXICAL_MAX_DF_RATIO)
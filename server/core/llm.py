@@ -1,10 +1,14 @@
-from langchain_openai import ChatOpenAI
 from config import OPENROUTER_API_KEY
+from utils.lazy import lazy_singleton
 
-llm = ChatOpenAI(
-    api_key=OPENROUTER_API_KEY,
-    base_url="https://openrouter.ai/api/v1",
-    model="openai/gpt-4.1-mini",
-    temperature=0,
-    max_tokens=300,
-)
+@lazy_singleton
+def get_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=OPENROUTER_API_KEY,
+        base_url="https://openrouter.ai/api/v1",
+        model="openai/gpt-4.1-mini",
+        temperature=0,
+        max_tokens=300,
+    )
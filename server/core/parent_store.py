@@ -0,0 +1,161 @@
+# core/parent_store.py
+import json
+import os
+import sqlite3
+from typing import List, Optional
+from config import PARENT_STORE_PATH
+from utils.lazy import lazy_singleton
+
+
+def render_with_page_anchors(elements: List[dict]) -> str:
+    """
+    Joins ordered {"text", "page_number"} elements, inserting a
+    <<< PAGE X >>> marker whenever the page changes.
+    """
+    # --- START ELITE LOGIC: INLINE PAGE ANCHORS ---
+    content_parts = []
+    current_page = None
+
+    for e in elements:
+        page_num = e.get("page_number", 1)
+
+        # Insert a marker ONLY when the page changes
+        if page_num != current_page:
+            content_parts.append(f"\n<<< PAGE {page_num} >>>\n")
+            current_page = page_num
+
+        content_parts.append(e['text'])
+    # --- END ELITE LOGIC ---
+
+    return "\n".join(content_parts)
+
+
+def element_rows(texts: List[str], metadatas: List[dict]) -> List[dict]:
+    """Chunk payload -> element rows sorted by element_index, then child chunk."""
+    return sorted(
+        (
+            {
+                "element_index": m.get("element_index", 0),
+                "chunk_index": m.get("chunk_index", 0),
+                "page_number": m.get("page_number", 1),
+                "text": t,
+            }
+            for t, m in zip(texts, metadatas)
+        ),
+        key=lambda e: (e["element_index"], e["chunk_index"]),
+    )
+
+
+def build_parent_document(parent_id: str, texts: List[str], metadatas: List[dict]) -> dict:
+    """
+    Reconstructs a full document in element order with inline page anchors.
+    Returns a DocumentContext dict.
+    """
+    elements = element_rows(texts, metadatas)
+
+    return {
+        "content": render_with_page_anchors(elements),
+        "source": metadatas[0].get("source", "Unknown") if metadatas else "Unknown",
+        "pages": sorted({e["page_number"] for e in elements}),
+        "doc_id": parent_id,
+    }
+
+
+class ParentStore:
+    """
+    parent_id -> materialized parent document, written once at ingest so
+    retrieval is a key lookup instead of a sibling fetch + rebuild.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parents (
+                    parent_id TEXT PRIMARY KEY,
+                    source TEXT,
+                    pages TEXT NOT NULL,
+                    content TEXT NOT NULL
+                )
+                """
+            )
+            # Per-element rows so retrieval can read a window instead of the whole filing
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS elements (
+                    parent_id TEXT NOT NULL,
+                    element_index INTEGER NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (parent_id, element_index, chunk_index)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, parent_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source, pages, content FROM parents WHERE parent_id = ?", (parent_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        source, pages, content = row
+        return {"content": content, "source": source, "pages": json.loads(pages), "doc_id": parent_id}
+
+    def put(self, document: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parents (parent_id, source, pages, content) VALUES (?, ?, ?, ?)",
+                (document["doc_id"], document["source"], json.dumps(document["pages"]), document["content"]),
+            )
+
+    def put_elements(self, parent_id: str, elements: List[dict]):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM elements WHERE parent_id = ?", (parent_id,))
+            conn.executemany(
+                "INSERT INTO elements (parent_id, element_index, chunk_index, page_number, text) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (parent_id, e["element_index"], e["chunk_index"], e["page_number"], e["text"])
+                    for e in elements
+                ],
+            )
+
+    def has_elements(self, parent_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM elements WHERE parent_id = ? LIMIT 1", (parent_id,)
+            ).fetchone()
+        return row is not None
+
+    def get_window(self, parent_id: str, first: int, last: int) -> List[dict]:
+        """Elements with first <= element_index <= last, in reading order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT element_index, chunk_index, page_number, text FROM elements "
+                "WHERE parent_id = ? AND element_index BETWEEN ? AND ? "
+                "ORDER BY element_index, chunk_index",
+                (parent_id, first, last),
+            ).fetchall()
+        return [
+            {"element_index": ei, "chunk_index": ci, "page_number": page, "text": text}
+            for ei, ci, page, text in rows
+        ]
+
+    def delete(self, parent_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM parents WHERE parent_id = ?", (parent_id,))
+            conn.execute("DELETE FROM elements WHERE parent_id = ?", (parent_id,))
+
+
+# Opened on first use, not at import
+@lazy_singleton
+def get_parent_store() -> ParentStore:
+    return ParentStore(PARENT_STORE_PATH)
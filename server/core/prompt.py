@@ -68,6 +68,16 @@ grader_prompt = ChatPromptTemplate.from_messages([
     ("human", "Retrieved document: \n\n {context} \n\n User question: {question}"),
 ])
 
+# Prompt 1b: Batched Document Relevance
+# Logic: Which of these PDFs match the User Question? One verdict per id.
+batch_grader_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a grader assessing relevance of several retrieved documents to a user question. "
+               "Each document is wrapped in <document id=\"...\"> tags. Grade every document on its own: "
+               "if it contains keyword(s) or semantic meaning related to the question, grade it as relevant. "
+               "Return one verdict per document id, copying the id exactly, with a binary score 'yes' or 'no'."),
+    ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+])
+
 # Prompt 2: Hallucination Check
 # Logic: Does the Answer match the Documents?
 hallucination_prompt = ChatPromptTemplate.from_messages([
@@ -0,0 +1,108 @@
+# core/rerank_batcher.py
+import asyncio
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+Pair = Tuple[str, str]
+
+
+class RerankBatcher:
+    """
+    Cross-request micro-batching for a cross-encoder. Callers submit their
+    (query, passage) pairs; a dedicated worker thread collects requests for
+    up to max_wait_ms or max_batch_pairs, scores them in one forward pass
+    and hands every caller back its own slice of the scores.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[List[Pair]], Sequence[float]],
+        max_batch_pairs: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.predict = predict
+        self.max_batch_pairs = max(1, max_batch_pairs)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._carry: Optional[tuple] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.pairs = 0
+
+    def _ensure_worker(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._thread.start()
+
+    async def score(self, pairs: List[Pair]) -> List[float]:
+        if not pairs:
+            return []
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((pairs, future, loop))
+        return await future
+
+    def _collect(self) -> List[tuple]:
+        """Blocks for the first request, then gathers more until the batch is full or the window closes."""
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_pairs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(request[0]) > self.max_batch_pairs:
+                # Would overflow this pass; it opens the next batch instead
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            all_pairs = [pair for pairs, _, _ in batch for pair in pairs]
+            try:
+                scores = [float(s) for s in self.predict(all_pairs)]
+            except Exception as e:
+                print(f"CRITICAL ERROR in rerank batch: {str(e)}")
+                for _, future, loop in batch:
+                    loop.call_soon_threadsafe(_resolve, future, None, e)
+                continue
+
+            self.batches += 1
+            self.pairs += len(all_pairs)
+            offset = 0
+            for pairs, future, loop in batch:
+                loop.call_soon_threadsafe(_resolve, future, scores[offset:offset + len(pairs)], None)
+                offset += len(pairs)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "pairs": self.pairs,
+            "avg_batch_pairs": self.pairs / self.batches if self.batches else 0.0,
+        }
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[Exception]):
+    # The caller may have been cancelled while its pairs were being scored
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
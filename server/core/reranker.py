@@ -1,11 +1,65 @@
 import asyncio
 from functools import partial
-from sentence_transformers import CrossEncoder
+from config import (
+    RERANKER_MODEL,
+    RERANKER_BACKEND,
+    RERANKER_ONNX_DIR,
+    RERANKER_ONNX_QUANTIZE,
+    RERANKER_ONNX_THREADS,
+    RERANK_BATCHING,
+    RERANK_MAX_BATCH_PAIRS,
+    RERANK_MAX_WAIT_MS,
+    RERANK_CACHE_SIZE,
+)
+from core.rerank_batcher import RerankBatcher
+from core.reranker_onnx import OnnxCrossEncoder, ensure_onnx_model
+from core.score_cache import ScoreCache, query_key
+from core.lexical_index import chunk_id
+
+def load_cross_encoder(backend: str = RERANKER_BACKEND):
+    """
+    torch: full-precision sentence-transformers CrossEncoder.
+    onnx: exported (by default int8-quantized) graph on onnxruntime.
+    Both expose the same predict(pairs, batch_size=...) call.
+    """
+    if backend == "onnx":
+        model_path = ensure_onnx_model(RERANKER_MODEL, RERANKER_ONNX_DIR, quantize=RERANKER_ONNX_QUANTIZE)
+        return OnnxCrossEncoder(model_path, threads=RERANKER_ONNX_THREADS)
+    if backend != "torch":
+        raise ValueError(f"Unknown RERANKER_BACKEND: {backend}")
+    # sentence-transformers pulls in torch; only import it when needed
+    from sentence_transformers import CrossEncoder
+
+    # Initializing on CPU as per your original code
+    return CrossEncoder(RERANKER_MODEL, device='cpu')
 
 class MiniLMReranker:
-    def __init__(self):
-        # Initializing on CPU as per your original code
-        self.model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2", device='cpu')
+    def __init__(self, backend: str = RERANKER_BACKEND):
+        self.backend = backend
+        self.model = load_cross_encoder(backend)
+
+        # Concurrent requests share forward passes on one worker thread
+        self.batcher = None
+        if RERANK_BATCHING:
+            self.batcher = RerankBatcher(
+                partial(self.model.predict, batch_size=RERANK_MAX_BATCH_PAIRS),
+                max_batch_pairs=RERANK_MAX_BATCH_PAIRS,
+                max_wait_ms=RERANK_MAX_WAIT_MS,
+            )
+
+        # Rewritten and repeated questions re-score the same chunks
+        self.cache = ScoreCache(RERANK_CACHE_SIZE)
+
+    async def score(self, pairs):
+        if self.batcher is not None:
+            return await self.batcher.score(pairs)
+
+        # Run CPU-bound prediction in a separate thread to avoid blocking the event loop
+        loop = asyncio.get_event_loop()
+        
+        # We use partial to pass arguments to the model.predict function
+        predict_func = partial(self.model.predict, pairs)
+        return await loop.run_in_executor(None, predict_func)
 
     async def rerank(self, query, docs):
         """
@@ -15,19 +69,25 @@ class MiniLMReranker:
         if not docs:
             return []
 
-        # 1. Prepare pairs
-        pairs = [(query, doc.page_content) for doc in docs]
+        # 1. Serve cached scores; only unseen (query, chunk) pairs are scored
+        q_key = query_key(query)
+        keys = [(q_key, doc.id or chunk_id(doc.metadata)) for doc in docs]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
 
-        # 2. Run CPU-bound prediction in a separate thread to avoid blocking the event loop
-        loop = asyncio.get_event_loop()
-        
-        # We use partial to pass arguments to the model.predict function
-        predict_func = partial(self.model.predict, pairs)
-        scores = await loop.run_in_executor(None, predict_func)
+        # 2. Score the rest, batched with other in-flight requests when enabled
+        fresh = {}
+        if missing:
+            pairs = [(query, docs[i].page_content) for i in missing]
+            fresh = dict(zip((keys[i] for i in missing), map(float, await self.score(pairs))))
+            self.cache.put_many(fresh)
+        scores = [cached[key] if key in cached else fresh[key] for key in keys]
 
-        # 3. Attach scores & sort
+        # 3. Attach scores & sort; graders read rerank_score downstream
+        for doc, score in zip(docs, scores):
+            doc.metadata["rerank_score"] = score
         scored = list(zip(docs, scores))
         scored_sorted = sorted(scored, key=lambda x: x[1], reverse=True)
 
         reranked_docs = [doc for doc, score in scored_sorted]
-        return reranked_docs
\ No newline at end of file
+        return reranked_docs
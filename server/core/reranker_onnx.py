@@ -0,0 +1,121 @@
+# core/reranker_onnx.py
+import inspect
+import json
+import os
+from typing import List, Sequence, Tuple
+import numpy as np
+
+FP32_MODEL = "model.onnx"
+INT8_MODEL = "model.int8.onnx"
+IDENTITY_ACTIVATIONS = ("torch.nn.modules.linear.Identity",)
+
+
+def export_onnx_cross_encoder(model_name: str, out_dir: str, quantize: bool = True) -> str:
+    """
+    Exports a Hugging Face cross-encoder to ONNX with dynamic batch and
+    sequence axes, then (optionally) applies dynamic int8 quantization.
+    Returns the path of the model to load.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # Eager attention plus a padded sample so the padding-mask path is traced
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_name, attn_implementation="eager"
+    ).eval()
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    sample = tokenizer(
+        ["query", "a longer query"],
+        ["passage", "a somewhat longer passage to force padding"],
+        padding=True,
+        return_tensors="pt",
+    )
+    # Traced inputs are positional, so follow forward()'s parameter order
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    fp32_path = os.path.join(out_dir, FP32_MODEL)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(out_dir, INT8_MODEL)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def ensure_onnx_model(model_name: str, out_dir: str, quantize: bool = True) -> str:
+    """Returns the exported model path, exporting on first use."""
+    path = os.path.join(out_dir, INT8_MODEL if quantize else FP32_MODEL)
+    if os.path.exists(path):
+        return path
+    print(f"---EXPORTING {model_name} TO ONNX ({'int8' if quantize else 'fp32'})---")
+    return export_onnx_cross_encoder(model_name, out_dir, quantize=quantize)
+
+
+class OnnxCrossEncoder:
+    """
+    onnxruntime drop-in for sentence_transformers.CrossEncoder.predict,
+    including its default sigmoid on single-logit models.
+    """
+
+    def __init__(self, model_path: str, max_length: int = 512, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = os.path.dirname(model_path)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        with open(os.path.join(model_dir, "config.json")) as f:
+            config = json.load(f)
+        self.apply_sigmoid = (
+            config.get("num_labels", len(config.get("id2label", {})) or 1) == 1
+            and config.get("sbert_ce_default_activation_function") not in IDENTITY_ACTIVATIONS
+        )
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, **_) -> np.ndarray:
+        scores: List[np.ndarray] = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            encoded = self.tokenizer(
+                [q for q, _ in batch],
+                [p for _, p in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            scores.append(logits[:, 0] if logits.ndim == 2 else logits)
+
+        result = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+        if self.apply_sigmoid:
+            result = 1 / (1 + np.exp(-result))
+        return result.astype(np.float32)
@@ -1,27 +1,105 @@
-from langchain_chroma import Chroma
-from core.embeddings import embeddings
-from config import PERSIST_DIR
+import asyncio
+from typing import Optional
+from config import (
+    HYBRID_SEARCH,
+    LEXICAL_K,
+    RRF_K,
+    CONTEXT_MODE,
+    CONTEXT_MAX_HITS,
+    CONTEXT_WINDOW_ELEMENTS,
+    CONTEXT_TOKEN_BUDGET,
+)
+from core.vectorstore import get_vector_backend, get_vector_access
 from core.reranker import MiniLMReranker
+from core.parent_store import get_parent_store, build_parent_document, element_rows
+from core.context_packer import pack_windows, window_bounds
+from core.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from core.answer_cache import get_answer_cache
+from utils.extractors.fiscal_filter import build_where_filter
+from utils.lazy import lazy_singleton
 
-vectorstore = Chroma(
-    persist_directory=PERSIST_DIR,
-    embedding_function=embeddings
-)
+# Child chunks pulled per search, before reranking
+RETRIEVER_K = 10
 
-# Base retriever for initial broad search
-retriever = vectorstore.as_retriever(search_kwargs={"k": 10}) 
-reranker = MiniLMReranker()
+# Built on first use (or by the startup warmup), not at import
+@lazy_singleton
+def get_reranker():
+    return MiniLMReranker()
 
-async def get_reranked_full_context(q: str):
+async def get_parent_document(parent_id: str):
     """
-    Retrieves, reranks, and then reconstructs full documents in order.
+    Materialized parent lookup. Documents ingested before the parent store
+    existed are rebuilt from their chunks once and backfilled.
+    Returns None when the parent no longer exists.
     """
-    # 1. Initial Retrieval (Child Chunks)
-    docs = await retriever.ainvoke(q)
-    
-    # 2. Rerank the chunks to find the most relevant document parts
-    reranked_docs = await reranker.rerank(q, docs)
-    
+    document = await asyncio.to_thread(get_parent_store().get, parent_id)
+    if document is not None:
+        return document
+
+    # Pull ALL siblings
+    full_doc_elements = await get_vector_access().get(
+        where={"parent_id": parent_id}, include=["documents", "metadatas"]
+    )
+    if not full_doc_elements['documents']:
+        return None
+
+    document = build_parent_document(
+        parent_id, full_doc_elements['documents'], full_doc_elements['metadatas']
+    )
+    await asyncio.to_thread(get_parent_store().put, document)
+    return document
+
+async def get_element_window(parent_id: str, first: int, last: int):
+    """
+    Element rows of one parent in [first, last]. Parents ingested before
+    per-element rows existed are backfilled from their chunks once.
+    """
+    if not await asyncio.to_thread(get_parent_store().has_elements, parent_id):
+        siblings = await get_vector_access().get(
+            where={"parent_id": parent_id}, include=["documents", "metadatas"]
+        )
+        if not siblings['documents']:
+            return []
+        await asyncio.to_thread(
+            get_parent_store().put_elements, parent_id, element_rows(siblings['documents'], siblings['metadatas'])
+        )
+    return await asyncio.to_thread(get_parent_store().get_window, parent_id, first, last)
+
+async def dense_search(q: str, where: Optional[dict] = None):
+    return await get_vector_access().similarity_search(q, RETRIEVER_K, where)
+
+async def hybrid_search(q: str, where: Optional[dict] = None):
+    """
+    Dense (Chroma) and lexical (BM25) search run in parallel, merged with
+    reciprocal rank fusion. Exact tokens like tickers and line-item names
+    are caught by BM25 even when the embedding misses them.
+    """
+    if not HYBRID_SEARCH:
+        return await dense_search(q, where)
+
+    dense_docs, lexical_docs = await asyncio.gather(
+        dense_search(q, where),
+        asyncio.to_thread(get_lexical_index().search, q, LEXICAL_K, where),
+    )
+    return reciprocal_rank_fusion([dense_docs, lexical_docs], k=RRF_K)
+
+async def search_chunks(q: str, fiscal_info: Optional[dict] = None):
+    """
+    Child-chunk search, pre-filtered on ticker/year/period when the
+    question names them. Falls back to the unfiltered search when the
+    filter matches nothing (e.g. a filing that was never ingested).
+    """
+    where = build_where_filter(fiscal_info)
+    if where is not None:
+        docs = await hybrid_search(q, where)
+        if docs:
+            return docs
+        print(f"---NO CHUNKS MATCH {where}, FALLING BACK TO UNFILTERED SEARCH---")
+
+    return await hybrid_search(q)
+
+async def get_full_parents(reranked_docs):
+    """Whole-filing context: the top 3 hits' parents, reconstructed in order."""
     # Limit to top 3 parents to stay within LLM context limits
     top_picks = reranked_docs[:3]
     
@@ -33,44 +111,83 @@ async def get_reranked_full_context(q: str):
         
         if parent_id and parent_id not in seen_parents:
             seen_parents.add(parent_id)
-            
-            # Pull ALL siblings
-            full_doc_elements = vectorstore.get(where={"parent_id": parent_id}, include=["documents", "metadatas"])
-
-            # Create element list and sort by element_index
-            elements = sorted(
-                [{"text": t, "meta": m} for t, m in zip(full_doc_elements['documents'], full_doc_elements['metadatas'])],
-                key=lambda x: x['meta'].get('element_index', 0)
-            )
-            
-            # --- START ELITE LOGIC: INLINE PAGE ANCHORS ---
-            content_parts = []
-            current_page = None
-            all_pages = set()
-
-            for e in elements:
-                page_num = e['meta'].get("page_number", 1)
-                all_pages.add(page_num)
-
-                # Insert a marker ONLY when the page changes
-                if page_num != current_page:
-                    content_parts.append(f"\n<<< PAGE {page_num} >>>\n")
-                    current_page = page_num
-                
-                content_parts.append(e['text'])
-            
-            full_text_with_anchors = "\n".join(content_parts)
-            # --- END ELITE LOGIC ---
-            
-            structured_results.append({
-                "content": full_text_with_anchors,
-                "source": elements[0]['meta'].get("source", "Unknown"),
-                "pages": sorted(list(all_pages)),
-                "doc_id": parent_id
-            })
+            document = await get_parent_document(parent_id)
+            if document is not None:
+                document["score"] = doc.metadata.get("rerank_score")
+                structured_results.append(document)
+
+    return structured_results
+
+async def get_packed_windows(reranked_docs):
+    """
+    Windowed context: neighbouring elements around the top hits, merged
+    per parent and cut at CONTEXT_TOKEN_BUDGET.
+    """
+    hits = [d for d in reranked_docs if d.metadata.get("parent_id")][:CONTEXT_MAX_HITS]
+    windows = await asyncio.gather(*(
+        get_element_window(
+            d.metadata["parent_id"],
+            *window_bounds(d.metadata.get("element_index", 0), CONTEXT_WINDOW_ELEMENTS),
+        )
+        for d in hits
+    ))
+    return pack_windows(hits, windows, CONTEXT_TOKEN_BUDGET)
+
+async def get_reranked_full_context(q: str, fiscal_info: Optional[dict] = None):
+    """
+    Retrieves, reranks, and then builds ordered, page-anchored context:
+    token-budgeted windows around the hits, or whole parents in "full" mode.
+    """
+    # 1. Initial Retrieval (Child Chunks)
+    docs = await search_chunks(q, fiscal_info)
+    
+    # 2. Rerank the chunks to find the most relevant document parts
+    reranked_docs = await get_reranker().rerank(q, docs)
+
+    # 3. Expand hits into context
+    if CONTEXT_MODE == "full":
+        structured_results = await get_full_parents(reranked_docs)
+    else:
+        structured_results = await get_packed_windows(reranked_docs)
 
     # Memory Cleanup
     del docs
     del reranked_docs
 
-    return structured_results
\ No newline at end of file
+    return structured_results
+
+def delete_local_parent(parent_id: str):
+    """The SQLite-side half of delete_parent (blocking)."""
+    get_parent_store().delete(parent_id)
+    get_lexical_index().delete_parent(parent_id)
+    get_answer_cache().invalidate_parent(parent_id)
+
+async def delete_parent(parent_id: str) -> int:
+    """
+    Removes every chunk of a previously ingested document, along with
+    its materialized parent, its BM25 postings and any cached answers
+    built from it.
+    Returns the number of chunks deleted.
+    """
+    await asyncio.to_thread(delete_local_parent, parent_id)
+    access = get_vector_access()
+    existing = await access.get(where={"parent_id": parent_id}, include=[])
+    ids = existing["ids"]
+    await access.delete(ids)
+    return len(ids)
+
+def rebuild_lexical_index(page_size: int = 5000) -> int:
+    """
+    Indexes every chunk already in the vector store for BM25, for stores
+    populated before hybrid search existed. Returns the number of chunks indexed.
+    """
+    vectorstore = get_vector_backend()
+    indexed = 0
+    offset = 0
+    while True:
+        page = vectorstore.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return indexed
+        get_lexical_index().add(page["ids"], page["documents"], page["metadatas"])
+        indexed += len(page["ids"])
+        offset += page_size
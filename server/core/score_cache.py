@@ -0,0 +1,60 @@
+# core/score_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+ScoreKey = Tuple[str, str]
+
+
+def query_key(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the cross-encoder's view enough to re-score."""
+    normalized = " ".join(query.lower().split()).rstrip("?.! ")
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Bounded in-memory LRU of cross-encoder scores keyed by
+    (normalized query hash, chunk id).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[ScoreKey, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[ScoreKey]) -> Dict[ScoreKey, float]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is None:
+                    self.misses += 1
+                    continue
+                self._scores.move_to_end(key)
+                found[key] = score
+                self.hits += 1
+        return found
+
+    def put_many(self, items: Dict[ScoreKey, float]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, score in items.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._scores),
+            "max_entries": self.max_entries,
+        }
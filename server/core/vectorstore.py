@@ -0,0 +1,151 @@
+# core/vectorstore.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional
+from config import (
+    VECTOR_BACKEND,
+    PERSIST_DIR,
+    CHROMA_MODE,
+    CHROMA_HOST,
+    CHROMA_PORT,
+    CHROMA_SSL,
+    CHROMA_COLLECTION,
+    VECTORSTORE_WORKERS,
+    HNSW_INDEX_DIR,
+    HNSW_DTYPE,
+    HNSW_CONNECTIVITY,
+    HNSW_EXPANSION_ADD,
+    HNSW_EXPANSION_SEARCH,
+    HNSW_MAX_SEGMENTS,
+    HNSW_EXACT_MAX,
+)
+from core.embeddings import get_embeddings
+from utils.lazy import lazy_singleton
+
+
+@lazy_singleton
+def get_chroma_client():
+    """
+    embedded: Chroma runs in-process on PERSIST_DIR.
+    client: a Chroma server process; the HTTP client keeps a pooled
+    keep-alive session, shared by every worker thread.
+    """
+    import chromadb
+
+    if CHROMA_MODE == "client":
+        return chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT, ssl=CHROMA_SSL)
+    if CHROMA_MODE != "embedded":
+        raise ValueError(f"Unknown CHROMA_MODE: {CHROMA_MODE}")
+    return chromadb.PersistentClient(path=PERSIST_DIR)
+
+
+@lazy_singleton
+def get_vectorstore():
+    """Synchronous langchain store; async code goes through get_vector_access()."""
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        client=get_chroma_client(),
+        collection_name=CHROMA_COLLECTION,
+        embedding_function=get_embeddings(),
+    )
+
+
+@lazy_singleton
+def get_collection():
+    """Raw chromadb handle on the same collection, for writes with precomputed vectors."""
+    return get_chroma_client().get_or_create_collection(CHROMA_COLLECTION)
+
+
+class ChromaBackend:
+    """Blocking Chroma calls (embedded or client mode, see CHROMA_MODE)."""
+
+    def similarity_search_by_vector(self, vector: List[float], k: int, where: Optional[dict] = None):
+        return get_vectorstore().similarity_search_by_vector(vector, k=k, filter=where)
+
+    def get(self, **kwargs) -> dict:
+        return get_vectorstore().get(**kwargs)
+
+    def add(self, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[dict]):
+        get_collection().upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+
+    def delete(self, ids: List[str]):
+        get_vectorstore().delete(ids=ids)
+
+
+@lazy_singleton
+def get_vector_backend():
+    """
+    The configured vector backend. Both expose the same blocking interface:
+    similarity_search_by_vector(vector, k, where), get(where, include, limit,
+    offset), add(ids, vectors, texts, metadatas) and delete(ids).
+    """
+    if VECTOR_BACKEND == "hnsw":
+        from core.hnsw_index import HnswIndex
+
+        return HnswIndex(
+            HNSW_INDEX_DIR,
+            dtype=HNSW_DTYPE,
+            connectivity=HNSW_CONNECTIVITY,
+            expansion_add=HNSW_EXPANSION_ADD,
+            expansion_search=HNSW_EXPANSION_SEARCH,
+            max_segments=HNSW_MAX_SEGMENTS,
+            exact_max=HNSW_EXACT_MAX,
+        )
+    if VECTOR_BACKEND != "chroma":
+        raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+    return ChromaBackend()
+
+
+class VectorStoreAccess:
+    """
+    Non-blocking vector store operations. Every backend call (including the
+    first, lazy client build) runs on a dedicated, sized thread pool rather
+    than the event loop or the shared default executor. Embedding calls
+    stay on the loop as async HTTP, so a slow embedding request never
+    holds a vector store thread.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vectorstore")
+        return self._executor
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+
+    async def similarity_search(self, query: str, k: int, where: Optional[dict] = None):
+        vector = await get_embeddings().aembed_query(query)
+        return await self._run(lambda: get_vector_backend().similarity_search_by_vector(vector, k, where))
+
+    async def get(self, **kwargs) -> dict:
+        return await self._run(lambda: get_vector_backend().get(**kwargs))
+
+    async def add_texts(self, texts: List[str], metadatas: List[dict], ids: List[str]):
+        vectors = await get_embeddings().aembed_documents(texts)
+        await self._run(lambda: get_vector_backend().add(ids, vectors, texts, metadatas))
+
+    async def delete(self, ids: List[str]):
+        if ids:
+            await self._run(lambda: get_vector_backend().delete(ids))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lazy_singleton
+def get_vector_access():
+    return VectorStoreAccess(VECTORSTORE_WORKERS)
+
+
+def shutdown_vector_access():
+    if get_vector_access.loaded():
+        get_vector_access().shutdown()
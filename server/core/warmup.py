@@ -0,0 +1,57 @@
+# core/warmup.py
+import asyncio
+import time
+from core.embeddings import get_embeddings
+from core.llm import get_llm
+from core.retriever import get_reranker
+from core.vectorstore import get_vector_backend
+
+# Read by /health/ready; "starting" until every component has loaded
+readiness = {"status": "starting", "components": {}, "error": None}
+
+
+def _open_vectorstore():
+    get_vector_backend().get(limit=1, include=[])
+
+
+def _first_rerank_pass():
+    # Straight to the model: no batcher window, nothing cached
+    get_reranker().model.predict([("warmup query", "warmup passage")])
+
+
+def _build_clients():
+    get_llm()
+    get_embeddings()
+
+
+async def _timed(name: str, step):
+    started = time.perf_counter()
+    await asyncio.to_thread(step)
+    readiness["components"][name] = {"loaded_ms": round((time.perf_counter() - started) * 1000)}
+
+
+async def warmup():
+    """
+    Startup stage run in the background by the app lifespan: loads the
+    heavy dependencies so the first real request does not pay for them.
+    Liveness (/health) answers throughout; readiness flips when done.
+    """
+    print("---WARMUP STARTED---")
+    try:
+        await asyncio.gather(
+            _timed("vectorstore", _open_vectorstore),
+            _timed("reranker", _first_rerank_pass),
+            _timed("clients", _build_clients),
+        )
+    except Exception as e:
+        print(f"CRITICAL ERROR in warmup: {str(e)}")
+        readiness.update(status="failed", error=str(e))
+        return
+
+    readiness["status"] = "ready"
+    print(f"---WARMUP DONE--- {readiness['components']}")
+
+
+def mark_ready():
+    """Warmup disabled: dependencies load lazily on first use."""
+    readiness["status"] = "ready"
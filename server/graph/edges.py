@@ -55,38 +55,31 @@ def doc_grader(state: AgentState):
     print(f"---DECISION: NOT USEFUL (Retry {retry_count}/3)---")
     return "not_useful"
 
-def check_hallucination(state: AgentState):
-    is_grounded = state.get("is_grounded") == "yes"
-    retry_count = state.get("retry_count", 0)
-
-    if is_grounded:
-        print("---DECISION: GROUNDED (Proceeding to Answer Evaluator)---")
-        return "grounded"
-    
-    # If it's a hallucination ('no') and we have retries left
-    if not is_grounded and retry_count < 3:
-        print(f"---DECISION: HALLUCINATION (Retry {retry_count+1}/3)---")
-        return "hallucinated"
-    
-    # Final fallback: out of retries, just give the answer
-    print("---DECISION: MAX RETRIES REACHED (Passing anyway)---")
-    return "grounded"
+def grade_generation(state: AgentState):
+    """
+    Joins the hallucination and answer-utility verdicts into one decision.
+    Same retry semantics as running the two checks in sequence: a
+    hallucination is retried first, then an unhelpful answer, and after
+    3 retries the answer is passed through regardless.
+    """
+    print('---EVALUATING GENERATION---')
 
-def answer_evaluator(state: AgentState):
-    print('---EVALUATING ANSWER---')
-    
+    is_grounded = state.get("is_grounded") == "yes"
     is_useful = state.get("is_useful") == "yes"
     retry_count = state.get("retry_count", 0)
 
-    if is_useful:
-        print("---DECISION: USEFUL (Proceeding to END)---")
+    if is_grounded and is_useful:
+        print("---DECISION: GROUNDED AND USEFUL (Proceeding to END)---")
         return "useful"
-    
-    # If it's a hallucination ('no') and we have retries left
-    if not is_useful and retry_count < 3:
-        print(f"---DECISION: NOT_USEFUL (Retry {retry_count+1}/3)---")
-        return "not_useful"
-    
+
     # Final fallback: out of retries, just give the answer
-    print("---DECISION: MAX RETRIES REACHED (Passing anyway)---")
-    return "useful"
\ No newline at end of file
+    if retry_count >= 3:
+        print("---DECISION: MAX RETRIES REACHED (Passing anyway)---")
+        return "useful"
+
+    if not is_grounded:
+        print(f"---DECISION: HALLUCINATION (Retry {retry_count+1}/3)---")
+        return "hallucinated"
+
+    print(f"---DECISION: NOT_USEFUL (Retry {retry_count+1}/3)---")
+    return "not_useful"
@@ -1,11 +1,13 @@
 # graph/nodes.py
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import asyncio
+from config import GRADING_MODE, GRADE_SCORE_PASS, GRADE_SCORE_FAIL, GRADER_BATCHING, GRADER_BATCH_MAX_CHARS
 from core.retriever import get_reranked_full_context
-from core.chain import get_chain, get_rewrite_chain, get_grader_chain, get_hallucination_chain, get_answer_grader_chain, get_router_chain
+from core.ingest_registry import get_ingest_registry
+from utils.extractors.fiscal_filter import extract_fiscal_filter
+from core.chain import get_chain, get_rewrite_chain, get_grader_chain, get_batch_grader_chain, get_hallucination_chain, get_answer_grader_chain, get_router_chain, grading_batches, format_grading_batch
 from .state import AgentState
 from langchain_core.messages import AIMessage, HumanMessage, trim_messages
-from core.llm import llm
 
 async def router_node(state: AgentState) -> Dict[str, Any]:
     print("---ROUTING NODE---")
@@ -36,21 +38,83 @@ def get_binary_score(res) -> str:
     
     return str(getattr(res, "binary_score", "no")).lower()
 
+def get_batch_verdicts(res) -> Dict[str, str]:
+    """Extracts {id: binary_score} safely from a batched grader response."""
+    if res is None:
+        return {}
+
+    verdicts = res.get("verdicts", []) if isinstance(res, dict) else getattr(res, "verdicts", [])
+    return {
+        str(v.get("id") if isinstance(v, dict) else v.id): get_binary_score(v)
+        for v in verdicts or []
+    }
+
+async def llm_grade(question: str, contents: List[str]) -> List[str]:
+    """
+    LLM relevance verdicts, one per content. Batched mode sends size-capped
+    batches of id-tagged documents; ids the LLM skipped are re-graded singly.
+    """
+    if not contents:
+        return []
+
+    verdicts: Dict[str, str] = {}
+    if GRADER_BATCHING:
+        items = [(f"doc-{i}", content) for i, content in enumerate(contents)]
+        batches = grading_batches(items, GRADER_BATCH_MAX_CHARS)
+        batch_chain = get_batch_grader_chain()
+        resList = await asyncio.gather(*(
+            batch_chain.ainvoke({"question": question, "documents": format_grading_batch(batch)})
+            for batch in batches
+        ))
+        for res in resList:
+            verdicts.update(get_batch_verdicts(res))
+        print(f"---BATCH GRADED {len(contents)} DOCUMENTS IN {len(batches)} CALL(S)---")
+
+    missing = [i for i in range(len(contents)) if f"doc-{i}" not in verdicts]
+    if missing:
+        grader_chain = get_grader_chain()
+        resList = await asyncio.gather(*(
+            grader_chain.ainvoke({"question": question, "context": contents[i]}) for i in missing
+        ))
+        for i, res in zip(missing, resList):
+            verdicts[f"doc-{i}"] = get_binary_score(res)
+
+    return [verdicts[f"doc-{i}"] for i in range(len(contents))]
+
+def score_verdict(doc) -> Optional[str]:
+    """
+    'yes' / 'no' straight from the reranker score, or None when the
+    document is borderline (or unscored) and needs the LLM grader.
+    """
+    score = doc.get("score")
+    if score is None:
+        return None
+    if score >= GRADE_SCORE_PASS:
+        return "yes"
+    if score <= GRADE_SCORE_FAIL:
+        return "no"
+    return None
+
 async def grade_documents_node(state: AgentState) -> Dict[str, Any]:
     print("---CHECKING DOCUMENT RELEVANCE---")
     question = state["question"]
     documents = state["documents"]
-    grader_chain = get_grader_chain()
 
     try:
-        tasks = [
-            grader_chain.ainvoke({ "question": question, "context": doc.page_content}) for doc in documents
-        ]
-
-        resList = await asyncio.gather(*tasks)
+        # In score mode only borderline documents cost an LLM call
+        if GRADING_MODE == "score":
+            verdicts = [score_verdict(doc) for doc in documents]
+        else:
+            verdicts = [None] * len(documents)
+        escalated = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        print(f"---GRADING: {len(documents) - len(escalated)} BY SCORE, {len(escalated)} BY LLM---")
+
+        graded = await llm_grade(question, [documents[i]["content"] for i in escalated])
+        for i, verdict in zip(escalated, graded):
+            verdicts[i] = verdict
 
         relevant_docs = [
-            doc for doc, res in zip(documents, resList) if get_binary_score(res) == 'yes'
+            doc for doc, verdict in zip(documents, verdicts) if verdict == 'yes'
         ]
 
         # Return the filtered list of documents
@@ -76,12 +140,42 @@ async def retrieve_node(state: AgentState) -> Dict[str, Any]:
     if not messages or messages[-1].type == "ai":
         updates["messages"] = [HumanMessage(content=question)]
     
+    # Narrow the vector search to the filing(s) the question names
+    known_tickers = await asyncio.to_thread(get_ingest_registry().tickers)
+    fiscal_info = extract_fiscal_filter(question, known_tickers)
+    updates["fiscal_info"] = fiscal_info
+
     # Use your existing reranking logic
-    documents = await get_reranked_full_context(question)
+    documents = await get_reranked_full_context(question, fiscal_info)
     updates["documents"] = documents
 
     return updates
 
+async def speculative_route_node(state: AgentState) -> Dict[str, Any]:
+    """
+    router_node and retrieve_node at the same time, so the router round trip
+    is off the critical path of technical questions. When the intent comes
+    back conversational the retrieval is cancelled and its result dropped.
+    """
+    print("---ROUTING WITH SPECULATIVE RETRIEVAL---")
+    retrieval = asyncio.create_task(retrieve_node(state))
+    try:
+        routed = await router_node(state)
+    except BaseException:
+        retrieval.cancel()
+        raise
+
+    if routed["intent"] == "conversational":
+        retrieval.cancel()
+        await asyncio.wait([retrieval])
+        # The speculative result (or error) is discarded either way
+        if not retrieval.cancelled():
+            retrieval.exception()
+        print("---SPECULATIVE RETRIEVAL DISCARDED---")
+        return routed
+
+    return {**routed, **(await retrieval)}
+
 async def generate_node(state: AgentState) -> Dict[str, Any]:
     """
     Step 2: Generate an answer using Structured Context Objects.
@@ -128,6 +222,7 @@ async def generate_node(state: AgentState) -> Dict[str, Any]:
         return {
             "messages": [AIMessage(content=generation)], 
             "generation": generation,
+            "sources": [d.get("doc_id") for d in documents if d.get("doc_id")],
         }
     except Exception as e:
         print(f"CRITICAL ERROR in generate_node: {str(e)}")
@@ -184,7 +279,7 @@ async def hallucination_grader_node(state: AgentState) -> Dict[str, Any]:
         return {"is_grounded": "yes"}
     
     # 1. Prepare the context
-    context = "\n\n".join([d.page_content for d in documents])
+    context = "\n\n".join([d.get("content", "") for d in documents])
     
     # 2. Run the Grader Chain
     # Note: You'll need to define get_hallucination_chain in your core/chain.py
@@ -229,4 +324,23 @@ async def answer_grader_node(state: AgentState) -> Dict[str, Any]:
     except Exception as e:
         print(f"CRITICAL ERROR in answer_grader_node: {str(e)}")
         # This will print the actual error (e.g., API Key missing, Rate Limit, etc.)
-        return {"is_useful": "no", "documents": []}
\ No newline at end of file
+        return {"is_useful": "no", "documents": []}
+
+async def grade_generation_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Runs the hallucination and answer-utility graders concurrently; both
+    judge the same generation independently. The grade_generation edge
+    joins the verdicts.
+    """
+    print("---GRADING GENERATION (HALLUCINATION + UTILITY)---")
+    grounded, useful = await asyncio.gather(
+        hallucination_grader_node(state),
+        answer_grader_node(state),
+    )
+
+    updates = {**grounded, **useful}
+    # A hallucination retry keeps the documents so rewrite_node can say why
+    if grounded.get("is_grounded") == "no":
+        updates.pop("documents", None)
+    return updates
+
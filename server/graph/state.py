@@ -7,6 +7,7 @@ class DocumentContext(TypedDict):
     source: str       # Filename (e.g., CV_aug_eng.pdf)
     pages: List[int]  # All page numbers involved in this context
     doc_id: str       # The parent_id for tracking
+    score: Optional[float]  # Best reranker score among the hits behind it
 
 class AgentState(TypedDict):
     question: str
@@ -14,8 +15,9 @@ class AgentState(TypedDict):
     # Annotated with add_messages makes this a "living" history list
     messages: Annotated[list[AnyMessage], add_messages]
     documents: List[DocumentContext]
-    fiscal_info: Optional[dict]  # e.g., {"ticker": "AAPL", "year": 2025, "period": "Q3"}
+    fiscal_info: Optional[dict]  # e.g., {"ticker": ["AAPL"], "year": [2025], "period": ["Q3"]}
     generation: str
+    sources: List[str]  # doc_ids the generation was grounded on
     retry_count: int
     is_grounded: str  # 'yes' or 'no'
     is_useful: str    # 'yes' or 'no'
\ No newline at end of file
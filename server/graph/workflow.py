@@ -1,55 +1,69 @@
 from langgraph.graph import END, StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
+from config import SPECULATIVE_RETRIEVAL
 from .state import AgentState
-from .nodes import retrieve_node, generate_node, rewrite_node, grade_documents_node, hallucination_grader_node, answer_grader_node, router_node
-from .edges import doc_grader, answer_evaluator, check_hallucination, route_based_on_intent
-
-workflow = StateGraph(AgentState)
-
-# Define Nodes
-workflow.add_node("route_intent", router_node)
-workflow.add_node("retrieve", retrieve_node)   # Uses retriever.py
-workflow.add_node("grade_docs", grade_documents_node)
-workflow.add_node("generate", generate_node)   # Uses chain.py
-workflow.add_node("rewrite", rewrite_node)     # New node to refine query
-workflow.add_node("grade_hallucination", hallucination_grader_node)
-workflow.add_node('grade_answer', answer_grader_node)
-
-# Build Graph logic
-
-workflow.add_edge(START, "route_intent")
-workflow.add_conditional_edges(
-    "route_intent", 
-    route_based_on_intent, 
-    {"conversational": "generate", "technical": "retrieve"}
-)
-workflow.add_edge("retrieve", "grade_docs")
-workflow.add_conditional_edges(
-    "grade_docs", 
-    doc_grader, 
-    {"useful": "generate", "not_useful": "rewrite"}
-)
-workflow.add_edge("rewrite", "retrieve")
-workflow.add_conditional_edges(
-    "generate",
-    route_based_on_intent,
-    {
-        "conversational": END, 
-        "technical": "grade_hallucination"
-    }
-)
-workflow.add_conditional_edges(
-    "grade_hallucination", 
-    check_hallucination, 
-    {"hallucinated": "rewrite", "grounded": 'grade_answer'}
-)
-workflow.add_conditional_edges(
-    "grade_answer", 
-    answer_evaluator, 
-    {"not_useful": "rewrite", "useful": END}
-)
+from .nodes import retrieve_node, generate_node, rewrite_node, grade_documents_node, grade_generation_node, router_node, speculative_route_node
+from .edges import doc_grader, grade_generation, route_based_on_intent
+
+def build_workflow(speculative_retrieval: bool = SPECULATIVE_RETRIEVAL) -> StateGraph:
+    """
+    The agent graph. With speculative_retrieval, routing and the first
+    retrieval run together in one node and a conversational intent
+    discards the retrieval; otherwise retrieval waits for the router.
+    """
+    workflow = StateGraph(AgentState)
+
+    # Define Nodes
+    if speculative_retrieval:
+        workflow.add_node("route_and_retrieve", speculative_route_node)
+    else:
+        workflow.add_node("route_intent", router_node)
+    workflow.add_node("retrieve", retrieve_node)   # Uses retriever.py
+    workflow.add_node("grade_docs", grade_documents_node)
+    workflow.add_node("generate", generate_node)   # Uses chain.py
+    workflow.add_node("rewrite", rewrite_node)     # New node to refine query
+    workflow.add_node("grade_generation", grade_generation_node)  # Both graders, concurrently
+
+    # Build Graph logic
+
+    if speculative_retrieval:
+        workflow.add_edge(START, "route_and_retrieve")
+        workflow.add_conditional_edges(
+            "route_and_retrieve",
+            route_based_on_intent,
+            {"conversational": "generate", "technical": "grade_docs"}
+        )
+    else:
+        workflow.add_edge(START, "route_intent")
+        workflow.add_conditional_edges(
+            "route_intent", 
+            route_based_on_intent, 
+            {"conversational": "generate", "technical": "retrieve"}
+        )
+    workflow.add_edge("retrieve", "grade_docs")
+    workflow.add_conditional_edges(
+        "grade_docs", 
+        doc_grader, 
+        {"useful": "generate", "not_useful": "rewrite"}
+    )
+    workflow.add_edge("rewrite", "retrieve")
+    workflow.add_conditional_edges(
+        "generate",
+        route_based_on_intent,
+        {
+            "conversational": END, 
+            "technical": "grade_generation"
+        }
+    )
+    workflow.add_conditional_edges(
+        "grade_generation",
+        grade_generation,
+        {"hallucinated": "rewrite", "not_useful": "rewrite", "useful": END}
+    )
+
+    return workflow
 
 
 memory = MemorySaver()
 
-agent_app = workflow.compile(checkpointer=memory)
\ No newline at end of file
+agent_app = build_workflow().compile(checkpointer=memory)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# ingest_cli.py
+# Offline bulk ingestion, e.g. a quarter's worth of 10-Qs:
+#   python ingest_cli.py filings/2024Q2/ --force
+# Backfill the BM25 index from an existing Chroma store:
+#   python ingest_cli.py --rebuild-lexical-index
+# Merge the HNSW backend's segments and drop deleted vectors:
+#   VECTOR_BACKEND=hnsw python ingest_cli.py --compact-vector-index
+import argparse
+import asyncio
+import json
+import os
+from core.ingest_registry import content_hasher
+from core.ingestion import INGEST_SETTINGS, ingest_batch
+from config import VECTOR_BACKEND
+from core.retriever import rebuild_lexical_index
+from core.vectorstore import get_vector_backend
+from utils.pdf_partition import shutdown_partition_executor
+
+
+def collect_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(".pdf")
+            )
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    hasher = content_hasher(INGEST_SETTINGS)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def print_progress(stage, progress):
+    print(f"---{stage.upper()}--- {progress}")
+
+
+async def main(paths, force):
+    items = [
+        {
+            "pdf_path": path,
+            "filename": os.path.basename(path),
+            "content_hash": hash_file(path),
+            "cleanup": False,  # never delete the caller's files
+        }
+        for path in collect_pdfs(paths)
+    ]
+    try:
+        return await ingest_batch(items, force=force, report=print_progress)
+    finally:
+        shutdown_partition_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-ingest 10-Q PDFs into the vector store.")
+    parser.add_argument("paths", nargs="*", help="PDF files or directories of PDFs")
+    parser.add_argument("--force", action="store_true", help="re-ingest filings already in the registry")
+    parser.add_argument(
+        "--rebuild-lexical-index", action="store_true",
+        help="index every chunk already in Chroma for BM25, then exit",
+    )
+    parser.add_argument(
+        "--compact-vector-index", action="store_true",
+        help="merge all HNSW segments into one (VECTOR_BACKEND=hnsw), then exit",
+    )
+    args = parser.parse_args()
+
+    if args.rebuild_lexical_index:
+        print(json.dumps({"indexed": rebuild_lexical_index()}))
+        raise SystemExit(0)
+    if args.compact_vector_index:
+        if VECTOR_BACKEND != "hnsw":
+            parser.error("--compact-vector-index requires VECTOR_BACKEND=hnsw")
+        print(json.dumps({"vectors": get_vector_backend().compact()}))
+        raise SystemExit(0)
+    if not args.paths:
+        parser.error("at least one path is required")
+
+    results = asyncio.run(main(args.paths, args.force))
+    print(json.dumps(results, indent=2))
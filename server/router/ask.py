@@ -1,59 +1,245 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, HumanMessage
 from schemas import ChatRequest
+from config import ANSWER_CACHE_ENABLED
+from core.answer_cache import get_answer_cache
+from core.embeddings import get_embeddings
+from core.ingest_registry import get_ingest_registry
+from utils.extractors.fiscal_filter import extract_fiscal_filter
 from graph.workflow import agent_app as agent_graph  # Import the COMPILED graph
 
 router = APIRouter(prefix="/ask", tags=["ask"])
 
-@router.post("/")
-async def ask_question(request: ChatRequest):
-    try:
-        # Prepare the initial State (TypedDict)
-        initial_state = {
+# Only the answer-writing node is streamed token by token
+STREAMED_NODE = "generate"
+
+async def answer_cache_key(question: str, has_history: bool):
+    """
+    (question embedding, scope, fiscal filter) for the semantic answer
+    cache, where scope is the set of ingested filings retrieval can draw
+    on: the filings the question's ticker/year/quarter selects, or every
+    filing when it names none (or none match and retrieval falls back to
+    the whole corpus), so any ingest changes the scope of an unscoped question.
+    Returns None for questions that probably lean on the conversation (a
+    follow-up that names no filing), which are never cached.
+    """
+    known_tickers = await asyncio.to_thread(get_ingest_registry().tickers)
+    fiscal_info = extract_fiscal_filter(question, known_tickers)
+    if has_history and not any(fiscal_info.values()):
+        return None
+
+    scope = await asyncio.to_thread(get_ingest_registry().retrieval_scope, fiscal_info)
+    embedding = await get_embeddings().aembed_query(question)
+    return embedding, scope, fiscal_info
+
+def turn_inputs(question: str, existing_state) -> dict:
+    if existing_state.values:
+        # We found history! 
+        # Reset the control flags so the new question starts fresh,
+        # but the 'messages' will automatically merge because of your State definition.
+        return {
+            "question": question,
+            "retry_count": 0,    # Reset!
+            "is_grounded": "",   # Reset!
+            "is_useful": "",     # Reset!
+            "sources": [],
+            "documents": []      # Clear old docs from the last turn
+        }
+
+    # First time user? Use the full initial state
+    return {
+        "question": question,
+        "documents": [],
+        "generation": "",
+        "sources": [],
+        "retry_count": 0,
+        "is_grounded": "",
+        "is_useful": "",
+        "messages": []
+    }
+
+def answer_response(question: str, answer: str, retries: int, sources: list, cached: bool) -> dict:
+    return {
+        "question": question,
+        "answer": answer,
+        "metadata": {
+            "retries": retries,
+            "sources_count": len(sources),
+            "cached": cached,
+        }
+    }
+
+async def lookup_cached_answer(request: ChatRequest, config: dict, existing_state):
+    """
+    Returns (cache_key, response). response is set when an already-graded
+    answer for the same question on the same filings can be served.
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return None, None
+    has_history = bool(existing_state.values.get("messages"))
+    cache_key = await answer_cache_key(request.question, has_history)
+    if cache_key is None:
+        return None, None
+
+    embedding, scope, _ = cache_key
+    hit = await asyncio.to_thread(get_answer_cache().lookup, embedding, scope)
+    if hit is None:
+        return cache_key, None
+
+    print(f"---ANSWER CACHE HIT ({hit['similarity']:.3f}): {hit['question']}---")
+    # Record the turn so follow-ups on this thread still see it
+    await agent_graph.aupdate_state(
+        config,
+        {
             "question": request.question,
+            "messages": [HumanMessage(content=request.question), AIMessage(content=hit["answer"])],
+            "generation": hit["answer"],
+            "sources": hit["sources"],
             "documents": [],
-            "generation": "",
-            "retry_count": 0,
-            "is_grounded": "",
-            "is_useful": "",
-            "messages": []
-        }
-        
+            "is_grounded": "yes",
+            "is_useful": "yes",
+        },
+        as_node="grade_generation",
+    )
+    return cache_key, answer_response(request.question, hit["answer"], 0, hit["sources"], cached=True)
 
-        
+async def remember_answer(question: str, cache_key, final_state: dict):
+    # Only answers that passed both graders are reused
+    if (
+        cache_key is not None
+        and final_state.get("intent") == "technical"
+        and final_state.get("is_grounded") == "yes"
+        and final_state.get("is_useful") == "yes"
+    ):
+        embedding, scope, fiscal_info = cache_key
+        await asyncio.to_thread(
+            get_answer_cache().put, question, embedding, scope,
+            final_state.get("generation"), final_state.get("sources", []), fiscal_info,
+        )
+
+@router.post("/")
+async def ask_question(request: ChatRequest):
+    try:
         config = {"configurable": {"thread_id": request.thread_id}}
 
         # check existing state by thread_id
         existing_state = await agent_graph.aget_state(config)
 
-        if existing_state.values:
-            # We found history! 
-            # Reset the control flags so the new question starts fresh,
-            # but the 'messages' will automatically merge because of your State definition.
-            inputs = {
-                "question": request.question,
-                "retry_count": 0,    # Reset!
-                "is_grounded": "",   # Reset!
-                "is_useful": "",     # Reset!
-                "documents": []      # Clear old docs from the last turn
-            }
-        else:
-            # First time user? Use your full initial_state
-            inputs = initial_state
+        cache_key, cached = await lookup_cached_answer(request, config, existing_state)
+        if cached is not None:
+            return cached
+
+        inputs = turn_inputs(request.question, existing_state)
 
         # 3. Run the Graph!
         # This will trigger: Retrieve -> Rerank -> Grade -> (Rewrite Loop) -> Generate
         final_state = await agent_graph.ainvoke(inputs, config=config)
+        await remember_answer(request.question, cache_key, final_state)
         
         # 4. Return the result
-        return {
-            "question": request.question,
-            "answer": final_state.get("generation"),
-            "metadata": {
-                "retries": final_state.get("retry_count"),
-                "sources_count": len(final_state.get("documents", []))
-            }
-        }
+        return answer_response(
+            request.question,
+            final_state.get("generation"),
+            final_state.get("retry_count"),
+            final_state.get("sources", []),
+            cached=False,
+        )
         
     except Exception as e:
         # Professional error handling
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_turn(request: ChatRequest):
+    """
+    Runs one turn through astream_events and yields SSE frames:
+      node        {"node", "status": "start" | "end"} for every graph node
+      token       {"text"} for each generate_node token as the LLM emits it
+      retraction  {"reason", "retry"} when the graders send a streamed answer
+                  back through rewrite; clients drop the tokens shown so far
+      final       the /ask response plus the grading verdicts
+      error       {"detail"} if the turn fails mid-stream
+    """
+    try:
+        config = {"configurable": {"thread_id": request.thread_id}}
+        existing_state = await agent_graph.aget_state(config)
+
+        cache_key, cached = await lookup_cached_answer(request, config, existing_state)
+        if cached is not None:
+            yield sse("token", {"text": cached["answer"]})
+            yield sse("final", {**cached, "grading": {"is_grounded": "yes", "is_useful": "yes"}})
+            return
+
+        inputs = turn_inputs(request.question, existing_state)
+        streamed = False
+        verdicts = {}
+        retries = 0
+
+        async for event in agent_graph.astream_events(inputs, config=config, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node == STREAMED_NODE:
+                text = event["data"]["chunk"].content
+                if isinstance(text, str) and text:
+                    streamed = True
+                    yield sse("token", {"text": text})
+                continue
+
+            # Node-level events carry the node's own name; nested runnables don't
+            if node is None or event["name"] != node:
+                continue
+
+            if kind == "on_chain_start":
+                if node == "rewrite" and streamed:
+                    reason = "hallucinated" if verdicts.get("is_grounded") == "no" else "not_useful"
+                    yield sse("retraction", {"reason": reason, "retry": retries + 1})
+                    streamed = False
+                if node == STREAMED_NODE:
+                    verdicts = {}
+                yield sse("node", {"node": node, "status": "start"})
+
+            elif kind == "on_chain_end":
+                output = event["data"].get("output")
+                if isinstance(output, dict):
+                    verdicts.update({k: output[k] for k in ("is_grounded", "is_useful") if k in output})
+                    retries = output.get("retry_count", retries)
+                yield sse("node", {"node": node, "status": "end"})
+
+        final_state = (await agent_graph.aget_state(config)).values
+        await remember_answer(request.question, cache_key, final_state)
+
+        response = answer_response(
+            request.question,
+            final_state.get("generation"),
+            final_state.get("retry_count"),
+            final_state.get("sources", []),
+            cached=False,
+        )
+        yield sse("final", {
+            **response,
+            "grading": {
+                "is_grounded": final_state.get("is_grounded", ""),
+                "is_useful": final_state.get("is_useful", ""),
+            },
+        })
+
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        print(f"CRITICAL ERROR in stream_turn: {str(e)}")
+        yield sse("error", {"detail": str(e)})
+
+@router.post("/stream")
+async def ask_question_stream(request: ChatRequest):
+    """POST /ask as Server-Sent Events, so tokens arrive while the graph runs."""
+    return StreamingResponse(
+        stream_turn(request),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,34 @@
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Response
+from core.embeddings import get_embeddings
+from core.retriever import get_reranker
+from core.answer_cache import get_answer_cache
+from core.warmup import readiness
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("/")
 async def health():
+    """Liveness: the process is up. Never touches the models."""
     return {"status": "ok"}
+
+@router.get("/ready")
+async def ready(response: Response):
+    """Readiness: 503 until the startup warmup has loaded every component."""
+    if readiness["status"] != "ready":
+        response.status_code = 503
+    return readiness
+
+@router.get("/stats")
+async def stats():
+    """Cache and batching counters for the answer, embedding and rerank paths."""
+    # Report only what is already loaded; stats must not trigger a model load
+    answer_cache = get_answer_cache() if get_answer_cache.loaded() else None
+    embeddings = get_embeddings() if get_embeddings.loaded() else None
+    reranker = get_reranker() if get_reranker.loaded() else None
+    return {
+        "answer_cache": await asyncio.to_thread(answer_cache.stats) if answer_cache else None,
+        "embedding_cache": embeddings.stats() if hasattr(embeddings, "stats") else None,
+        "rerank_cache": reranker.cache.stats() if reranker else None,
+        "rerank_batching": reranker.batcher.stats() if reranker and reranker.batcher is not None else None,
+    }
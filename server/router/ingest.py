@@ -1,144 +1,113 @@
 # router/ingest.py
-import uuid
-import tempfile
-from fastapi import APIRouter, UploadFile
-from unstructured.partition.pdf import partition_pdf
-from core.retriever import vectorstore
-from utils.extractors.tenq_metadata import regex_extract_tenq_metadata, llm_extract_tenq_metadata
-from utils.vision.financial_image import summarize_financial_image
+import asyncio
+from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile
+from config import SPOOL_DIR, MAX_UPLOAD_MB, UPLOAD_CHUNK_BYTES
+from core.ingest_registry import get_ingest_registry, content_hasher
+from core.ingest_jobs import ingest_jobs
+from core.ingestion import INGEST_SETTINGS, duplicate_result, ingest_pdf, ingest_batch
+from utils.file import spool_upload, delete_temp_file, UploadTooLargeError
 router = APIRouter(prefix="/ingest")
 
-@router.post("/")
-async def ingest_10q_multimodal(file: UploadFile):
+@router.post("/", status_code=202)
+async def ingest_10q_multimodal(file: UploadFile, force: bool = False):
     """
-    Modern multimodal 10-Q ingestion:
+    Modern multimodal 10-Q ingestion, run as a background job:
+    - content-addressed dedup (force=true to re-ingest)
     - deterministic first
     - structured LLM fallback
     - modality-aware storage
+    Returns the job record; poll GET /ingest/{job_id} for progress.
     """
 
     # --------------------------------------------------
-    # 1. Save PDF to temp file (required by unstructured)
+    # 1. Stream PDF to the spool dir (required by unstructured)
     # --------------------------------------------------
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(await file.read())
-        pdf_path = tmp.name
+    hasher = content_hasher(INGEST_SETTINGS)
+    try:
+        pdf_path, _ = await spool_upload(
+            file,
+            SPOOL_DIR,
+            max_bytes=MAX_UPLOAD_MB * 1024 * 1024,
+            chunk_size=UPLOAD_CHUNK_BYTES,
+            hasher=hasher,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    elements = partition_pdf(
-        filename=pdf_path,
-        strategy="auto",
-        extract_images_in_pdf=True,
-        infer_table_structure=True,
-        chunking_strategy=None,
-    )
-
-    # --------------------------------------------------
-    # 2. Extract cover text safely
-    # --------------------------------------------------
-    cover_text = "\n".join(
-        el.text for el in elements[:20]
-        if hasattr(el, "text") and el.text
-    )[:3000]
-
-    # --------------------------------------------------
-    # 3. Regex-first metadata extraction
     # --------------------------------------------------
-    regex_metadata = regex_extract_tenq_metadata(cover_text)
-    ticker = regex_metadata.ticker
-    year = regex_metadata.year
-    period = regex_metadata.period
-    used_llm = False
-
-    # --------------------------------------------------
-    # 4. Structured LLM fallback (ONLY if needed)
+    # 2. Dedup: same bytes + same settings = same filing
     # --------------------------------------------------
-    if ticker is None or year is None or period is None:
-        used_llm = True
-        llm_metadata = await llm_extract_tenq_metadata(cover_text)
-        
-        if ticker is None:
-            ticker = llm_metadata.ticker
-        if year is None:
-            year = llm_metadata.year
-        if period is None:
-            period = llm_metadata.period
-
+    content_hash = hasher.hexdigest()
+    existing = await asyncio.to_thread(get_ingest_registry().get, content_hash)
 
-    ticker = ticker.strip().upper() if isinstance(ticker, str) else "UNKNOWN"
+    if existing and not force:
+        delete_temp_file(pdf_path)
+        return ingest_jobs.record_completed(file.filename, duplicate_result(existing))
 
-    metadata_complete = (
-        ticker != "UNKNOWN" and
-        year is not None and
-        period is not None
-    )
+    # The same bytes already queued or running: share that job
+    in_flight = ingest_jobs.in_flight(content_hash)
+    if in_flight is not None:
+        delete_temp_file(pdf_path)
+        return in_flight
 
     # --------------------------------------------------
-    # 5. Build vectorstore payload (modality-aware)
+    # 3. Hand off to the worker pool (the job owns pdf_path)
     # --------------------------------------------------
-    parent_id = str(uuid.uuid4())
-    texts = []
-    metadatas = []
-
-    for idx, el in enumerate(elements):
-        base_meta = {
-            "parent_id": parent_id,
-            "ticker": ticker,
-            "year": year,
-            "period": period,
-            "metadata_complete": metadata_complete,
-            "source": file.filename,
-            "page_number": el.metadata.page_number or 1,
-            "element_index": idx,
-        }
-
-        # -------- IMAGE --------
-        if el.category == "Image" and el.metadata.image_base64:
-            summary = await summarize_financial_image(
-                el.metadata.image_base64
+    try:
+        return ingest_jobs.submit(
+            ingest_pdf,
+            spool_paths=[pdf_path],
+            pdf_path=pdf_path,
+            filename=file.filename,
+            content_hash=content_hash,
+            existing=existing,
+        )
+    except Exception:
+        delete_temp_file(pdf_path)
+        raise
+
+@router.post("/batch", status_code=202)
+async def ingest_10q_batch(files: List[UploadFile], force: bool = False):
+    """
+    Multi-file ingestion as a single pipelined background job.
+    The job result lists one entry per file, in upload order, in the
+    same shape as the single-file result plus the filename.
+    """
+    items = []
+    try:
+        for file in files:
+            hasher = content_hasher(INGEST_SETTINGS)
+            pdf_path, _ = await spool_upload(
+                file,
+                SPOOL_DIR,
+                max_bytes=MAX_UPLOAD_MB * 1024 * 1024,
+                chunk_size=UPLOAD_CHUNK_BYTES,
+                hasher=hasher,
             )
-            texts.append(summary)
-            metadatas.append({
-                **base_meta,
-                "modality": "image",
-                "type": "chart",
-            })
-
-        # -------- TABLE --------
-        elif el.category == "Table":
-            table_html = el.metadata.text_as_html or el.text
-            texts.append(table_html)
-            metadatas.append({
-                **base_meta,
-                "modality": "table",
-                "type": "financial_table",
-            })
-
-        # -------- TEXT --------
-        elif hasattr(el, "text") and el.text:
-            texts.append(el.text)
-            metadatas.append({
-                **base_meta,
-                "modality": "text",
-                "type": "narrative",
+            items.append({
+                "pdf_path": pdf_path,
+                "filename": file.filename,
+                "content_hash": hasher.hexdigest(),
             })
 
-    if not texts:
-        raise ValueError("No ingestable content extracted from 10-Q")
-
-    # --------------------------------------------------
-    # 6. Persist
-    # --------------------------------------------------
-    await vectorstore.aadd_texts(
-        texts=texts,
-        metadatas=metadatas,
-    )
-
-    return {
-        "status": "success",
-        "parent_id": parent_id,
-        "ticker": ticker,
-        "year": year,
-        "period": period,
-        "used_llm_fallback": used_llm,
-        "chunks": len(texts),
-    }
+        return ingest_jobs.submit(
+            ingest_batch,
+            spool_paths=[item["pdf_path"] for item in items],
+            items=items,
+            force=force,
+        )
+
+    except Exception as e:
+        for item in items:
+            delete_temp_file(item["pdf_path"])
+        if isinstance(e, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
+
+@router.get("/{job_id}")
+async def ingest_status(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingest job")
+    return job
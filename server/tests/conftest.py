@@ -0,0 +1,13 @@
+import os
+import shutil
+import tempfile
+
+# Local stores and the embedded Chroma dir open lazily under these paths;
+# set before config is imported so test runs never write into the tree
+_scratch = tempfile.mkdtemp(prefix="server-tests-")
+os.environ["DATA_DIR"] = os.path.join(_scratch, "data")
+os.environ["PERSIST_DIR"] = os.path.join(_scratch, "chroma_db")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_scratch, ignore_errors=True)
@@ -0,0 +1,124 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app import app
+from core.answer_cache import AnswerCache
+from core.embeddings import get_embeddings
+from core.ingest_registry import IngestRegistry
+
+QUESTION = {"question": "What was AAPL revenue in Q2 2024?", "thread_id": "answer-cache"}
+GRADED_STATE = {
+    "generation": "Revenue was $85.8B.",
+    "intent": "technical",
+    "is_grounded": "yes",
+    "is_useful": "yes",
+    "retry_count": 0,
+    "sources": ["parent-1"],
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    registry = IngestRegistry(str(tmp_path / "registry.sqlite3"))
+    registry.put("hash-1", {
+        "parent_id": "parent-1", "filename": "aapl.pdf", "ticker": "AAPL",
+        "year": 2024, "period": "Q2", "chunks": 10,
+    })
+    answers = AnswerCache(
+        str(tmp_path / "answers.sqlite3"), threshold=0.95, ttl_seconds=60, max_entries=10, max_per_scope=10
+    )
+    with patch("router.ask.get_ingest_registry", return_value=registry), \
+            patch("router.ask.get_answer_cache", return_value=answers), \
+            patch.object(get_embeddings(), "aembed_query", new=AsyncMock(return_value=[1.0, 0.0, 0.0])):
+        yield answers
+
+
+# a graded answer is reused until a contributing filing is invalidated
+def test_ask_reuses_graded_answer_until_invalidated(cache):
+    client = TestClient(app)
+    with patch("router.ask.agent_graph.ainvoke", new=AsyncMock(return_value=GRADED_STATE)) as mock_graph:
+        first = client.post("/ask", json=QUESTION).json()
+        second = client.post("/ask", json=QUESTION).json()
+
+        assert first["metadata"]["cached"] is False
+        assert second["metadata"]["cached"] is True
+        assert second["answer"] == "Revenue was $85.8B."
+        assert mock_graph.await_count == 1
+
+        assert cache.invalidate_parent("parent-1") == 1
+        third = client.post("/ask", json=QUESTION).json()
+
+        assert third["metadata"]["cached"] is False
+        assert mock_graph.await_count == 2
+
+
+def test_answer_cache_scope_and_threshold(tmp_path):
+    answers = AnswerCache(
+        str(tmp_path / "answers.sqlite3"), threshold=0.95, ttl_seconds=60, max_entries=10, max_per_scope=10
+    )
+    answers.put("q", [1.0, 0.0], ["parent-1"], "answer", ["parent-1"], {})
+
+    assert answers.lookup([0.99, 0.05], ["parent-1"])["answer"] == "answer"
+    assert answers.lookup([0.7, 0.7], ["parent-1"]) is None
+    assert answers.lookup([1.0, 0.0], ["parent-2"]) is None
+
+
+# each scope keeps its newest entries; the in-memory vectors follow the table
+def test_answer_cache_bounds_each_scope(tmp_path):
+    answers = AnswerCache(
+        str(tmp_path / "answers.sqlite3"), threshold=0.95, ttl_seconds=60, max_entries=10, max_per_scope=2
+    )
+    answers.put("q1", [1.0, 0.0, 0.0], ["parent-1"], "first", ["parent-1"], {})
+    assert answers.lookup([1.0, 0.0, 0.0], ["parent-1"])["answer"] == "first"
+
+    answers.put("q2", [0.0, 1.0, 0.0], ["parent-1"], "second", ["parent-1"], {})
+    answers.put("q3", [0.0, 0.0, 1.0], ["parent-1"], "third", ["parent-2"], {})
+
+    assert answers.lookup([1.0, 0.0, 0.0], ["parent-1"]) is None
+    assert answers.lookup([0.0, 0.0, 1.0], ["parent-1"])["answer"] == "third"
+    assert answers.invalidate_parent("parent-2") == 1
+    assert answers.lookup([0.0, 0.0, 1.0], ["parent-1"]) is None
+    assert answers.lookup([0.0, 1.0, 0.0], ["parent-1"])["answer"] == "second"
+    assert answers.stats()["entries"] == 1
+
+
+# entries for a filing set that changed are pruned, other scopes are kept
+def test_answer_cache_prunes_stale_scopes(tmp_path):
+    answers = AnswerCache(
+        str(tmp_path / "answers.sqlite3"), threshold=0.95, ttl_seconds=60, max_entries=10, max_per_scope=10
+    )
+    aapl = {"ticker": ["AAPL"], "year": [], "period": []}
+    answers.put("unscoped", [1.0, 0.0], ["parent-1"], "all", ["parent-1"], {})
+    answers.put("scoped", [0.0, 1.0], ["parent-1"], "aapl", ["parent-1"], aapl)
+
+    # a MSFT filing joins the corpus: only the unscoped entry is stale
+    resolve = {json.dumps({}): ["parent-1", "parent-2"], json.dumps(aapl, sort_keys=True): ["parent-1"]}
+    assert answers.prune_scopes(lambda f: resolve[json.dumps(f, sort_keys=True)]) == 1
+
+    assert answers.lookup([0.0, 1.0], ["parent-1"])["answer"] == "aapl"
+    assert answers.lookup([1.0, 0.0], ["parent-1"]) is None
+    assert answers.stats()["entries"] == 1
+
+
+# an unscoped question spans every filing, so a new ingest changes its scope
+def test_unscoped_answer_is_not_served_after_new_filing(cache, tmp_path):
+    client = TestClient(app)
+
+    def ask(thread_id):
+        # fresh threads: a cache hit records the turn, making later asks follow-ups
+        question = {"question": "What drove revenue growth?", "thread_id": thread_id}
+        return client.post("/ask", json=question).json()
+
+    with patch("router.ask.agent_graph.ainvoke", new=AsyncMock(return_value=GRADED_STATE)) as mock_graph:
+        assert ask("unscoped-1")["metadata"]["cached"] is False
+        assert ask("unscoped-2")["metadata"]["cached"] is True
+
+        IngestRegistry(str(tmp_path / "registry.sqlite3")).put("hash-2", {
+            "parent_id": "parent-2", "filename": "msft.pdf", "ticker": "MSFT",
+            "year": 2024, "period": "Q3", "chunks": 12,
+        })
+
+        assert ask("unscoped-3")["metadata"]["cached"] is False
+        assert mock_graph.await_count == 2
@@ -0,0 +1,101 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+from app import app
+
+QUESTION = {"question": "What was AAPL revenue in Q2 2024?", "thread_id": "ask-stream"}
+FINAL_STATE = {
+    "generation": "Revenue was $85.8B.",
+    "intent": "technical",
+    "is_grounded": "yes",
+    "is_useful": "yes",
+    "retry_count": 1,
+    "sources": ["parent-1"],
+}
+
+
+def node(kind, name, output=None):
+    return {"event": kind, "name": name, "metadata": {"langgraph_node": name}, "data": {"output": output}}
+
+
+def token(text):
+    return {
+        "event": "on_chat_model_stream",
+        "name": "ChatOpenAI",
+        "metadata": {"langgraph_node": "generate"},
+        "data": {"chunk": AIMessageChunk(content=text)},
+    }
+
+
+def grader_token(text):
+    return {**token(text), "metadata": {"langgraph_node": "grade_generation"}}
+
+
+# a hallucinated first draft is retracted before the rewrite
+EVENTS = [
+    node("on_chain_start", "generate"),
+    token("Revenue was "), token("$90B."),
+    node("on_chain_end", "generate", {"generation": "Revenue was $90B."}),
+    node("on_chain_start", "grade_generation"),
+    grader_token("{\"binary_score\": \"no\"}"),
+    node("on_chain_end", "grade_generation", {"is_grounded": "no", "is_useful": "yes"}),
+    node("on_chain_start", "rewrite"),
+    node("on_chain_end", "rewrite", {"retry_count": 1}),
+    node("on_chain_start", "generate"),
+    token("Revenue was $85.8B."),
+    node("on_chain_end", "generate", {"generation": "Revenue was $85.8B."}),
+]
+
+
+def parse_sse(body):
+    frames = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+async def fake_stream(inputs, config=None, version=None):
+    for event in EVENTS:
+        yield event
+
+
+def test_ask_stream_emits_tokens_retraction_and_final():
+    client = TestClient(app)
+    states = [SimpleNamespace(values={}), SimpleNamespace(values=FINAL_STATE)]
+    with patch("router.ask.ANSWER_CACHE_ENABLED", False), \
+            patch("router.ask.agent_graph.aget_state", new=AsyncMock(side_effect=states)), \
+            patch("router.ask.agent_graph.astream_events", new=fake_stream):
+        response = client.post("/ask/stream", json=QUESTION)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = parse_sse(response.text)
+    kinds = [kind for kind, _ in frames]
+
+    tokens = [data["text"] for kind, data in frames if kind == "token"]
+    assert tokens == ["Revenue was ", "$90B.", "Revenue was $85.8B."]  # grader output is not streamed
+
+    retraction = frames[kinds.index("retraction")][1]
+    assert retraction == {"reason": "hallucinated", "retry": 1}
+    assert kinds.index("retraction") < kinds.index("token", kinds.index("retraction"))
+    assert ("node", {"node": "rewrite", "status": "start"}) in frames
+
+    kind, final = frames[-1]
+    assert kind == "final"
+    assert final["answer"] == "Revenue was $85.8B."
+    assert final["metadata"] == {"retries": 1, "sources_count": 1, "cached": False}
+    assert final["grading"] == {"is_grounded": "yes", "is_useful": "yes"}
+
+
+# failures after the headers are sent are reported in-band
+def test_ask_stream_reports_errors_as_events():
+    client = TestClient(app)
+    with patch("router.ask.ANSWER_CACHE_ENABLED", False), \
+            patch("router.ask.agent_graph.aget_state", new=AsyncMock(side_effect=RuntimeError("boom"))):
+        frames = parse_sse(client.post("/ask/stream", json=QUESTION).text)
+
+    assert frames == [("error", {"detail": "boom"})]
@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from core.context_packer import pack_windows
+
+
+def row(index, page, text=None, chunk=0):
+    return {"element_index": index, "chunk_index": chunk, "page_number": page, "text": text or f"e{index}"}
+
+
+def hit(parent_id, index, score=None, chunk=0):
+    return Document(page_content="", metadata={
+        "parent_id": parent_id, "element_index": index, "chunk_index": chunk,
+        "source": f"{parent_id}.pdf", "rerank_score": score,
+    })
+
+
+def words(text):
+    return len(text.split())
+
+
+# overlapping windows of one parent merge; distant runs get a gap marker
+def test_windows_merge_and_keep_page_anchors():
+    hits = [hit("a", 2, 4.5), hit("a", 3, 1.0), hit("a", 9, -2.0)]
+    windows = [
+        [row(1, 1), row(2, 1), row(3, 2)],
+        [row(2, 1), row(3, 2), row(4, 2)],
+        [row(8, 4), row(9, 4), row(10, 4)],
+    ]
+
+    [document] = pack_windows(hits, windows, budget=100, count=words)
+
+    assert document["doc_id"] == "a"
+    assert document["source"] == "a.pdf"
+    assert document["pages"] == [1, 2, 4]
+    assert document["score"] == 4.5  # best hit's rerank score
+    assert document["content"].split() == [
+        "<<<", "PAGE", "1", ">>>", "e1", "e2",
+        "<<<", "PAGE", "2", ">>>", "e3", "e4", "[...]",
+        "<<<", "PAGE", "4", ">>>", "e8", "e9", "e10",
+    ]
+
+
+# the budget is spent on the best hit first, from the hit outward
+def test_budget_stops_packing_in_rank_order():
+    hits = [hit("a", 5), hit("b", 0)]
+    windows = [
+        [row(4, 1, "x x"), row(5, 1, "hit"), row(6, 1, "y y")],
+        [row(0, 1, "other")],
+    ]
+
+    documents = pack_windows(hits, windows, budget=3, count=words)
+
+    assert [d["doc_id"] for d in documents] == ["a"]
+    assert "hit" in documents[0]["content"]
+    assert "x x" in documents[0]["content"]
+    assert "y y" not in documents[0]["content"]
+
+
+# a hit deep inside a split table goes in before the table's earlier chunks
+def test_hit_chunk_packed_before_its_sibling_chunks():
+    hits = [hit("a", 4, chunk=3)]
+    windows = [[row(4, 2, f"rows {c}", chunk=c) for c in range(5)] + [row(5, 2, "after")]]
+
+    [document] = pack_windows(hits, windows, budget=4, count=words)
+
+    assert document["content"].split() == [
+        "<<<", "PAGE", "2", ">>>", "rows", "2", "rows", "3",
+    ]
@@ -0,0 +1,63 @@
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+
+
+class CountingEmbeddings(Embeddings):
+    model = "fake-model"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# repeat texts (modulo whitespace) are served from the cache
+def test_cached_embeddings_only_embed_misses(tmp_path):
+    underlying = CountingEmbeddings()
+    store = SQLiteEmbeddingStore(str(tmp_path / "cache.sqlite3"), max_bytes=1024 * 1024)
+    cached = CachedEmbeddings(underlying, store)
+
+    first = cached.embed_documents(["Total revenue", "Net income"])
+    second = cached.embed_documents(["Total  revenue\n", "Operating cash flow"])
+
+    assert second[0] == first[0]
+    assert underlying.calls == [["Total revenue", "Net income"], ["Operating cash flow"]]
+    assert cached.embed_query("Net income") == first[1]
+
+    stats = cached.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+
+
+# once over the byte cap, least-recently-used vectors are dropped
+def test_embedding_store_evicts_least_recently_used(tmp_path):
+    # each 2-dim float32 vector is 8 bytes
+    store = SQLiteEmbeddingStore(str(tmp_path / "cache.sqlite3"), max_bytes=20)
+
+    store.put_many({"a": [1.0, 1.0]})
+    store.put_many({"b": [2.0, 2.0]})
+    store.get_many(["a"])
+    store.put_many({"c": [3.0, 3.0]})
+
+    assert set(store.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert store.total_bytes <= 20
+
+
+# running totals track replaced rows without rescanning the table
+def test_embedding_store_totals_survive_replacement(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteEmbeddingStore(path, max_bytes=1024)
+
+    store.put_many({"a": [1.0, 1.0], "b": [2.0, 2.0]})
+    store.put_many({"a": [1.0, 1.0, 1.0], "c": [3.0]})
+
+    assert (store.entries, store.total_bytes) == (3, 12 + 8 + 4)
+    reopened = SQLiteEmbeddingStore(path, max_bytes=1024)
+    assert (reopened.entries, reopened.total_bytes) == (store.entries, store.total_bytes)
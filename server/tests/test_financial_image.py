@@ -0,0 +1,84 @@
+import asyncio
+import base64
+import io
+from unittest.mock import AsyncMock, patch
+
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.vision.financial_image import ImageSummaryCache, summarize_financial_images
+
+
+def png_base64(width, height, shade=0):
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    for x in range(width // 2):
+        for y in range(height):
+            img.putpixel((x, y), (shade, shade, shade))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def table_base64(figure, fmt="PNG"):
+    img = Image.new("RGB", (800, 400), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    for y in range(0, 400, 80):
+        draw.line([(0, y), (800, y)], fill=(0, 0, 0), width=2)
+    font = ImageFont.load_default(size=28)
+    draw.text((40, 100), "Total net sales", fill=(0, 0, 0), font=font)
+    draw.text((500, 100), figure, fill=(0, 0, 0), font=font)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **({"compress_level": 1} if fmt == "PNG" else {}))
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+# tiny images are skipped; the same graphic in a later filing hits the cache
+def test_small_images_skipped_and_logos_cached(tmp_path):
+    cache = ImageSummaryCache(str(tmp_path / "images.sqlite3"))
+    logo = png_base64(400, 200)
+    logo_again = png_base64(400, 200)
+    rule = png_base64(600, 4)
+
+    with patch(
+        "utils.vision.financial_image.get_image_summary_cache",
+        return_value=cache,
+    ), patch(
+        "utils.vision.financial_image.describe_image",
+        new=AsyncMock(return_value="Company logo"),
+    ) as mock_describe:
+
+        first = asyncio.run(summarize_financial_images([logo, rule]))
+        second = asyncio.run(summarize_financial_images([logo_again]))
+
+        assert first == ["Company logo", None]
+        assert second == ["Company logo"]
+        mock_describe.assert_awaited_once()
+
+        # payload was downscaled and re-encoded as JPEG
+        sent = base64.b64decode(mock_describe.await_args.args[0])
+        assert Image.open(io.BytesIO(sent)).format == "JPEG"
+
+
+# same-layout tables with different figures never share a summary
+def test_same_layout_tables_are_not_reused(tmp_path):
+    cache = ImageSummaryCache(str(tmp_path / "images.sqlite3"))
+    first_table = table_base64("85,777")
+    other_table = table_base64("90,753")
+    recompressed = table_base64("85,777", fmt="BMP")
+
+    with patch(
+        "utils.vision.financial_image.get_image_summary_cache",
+        return_value=cache,
+    ), patch(
+        "utils.vision.financial_image.describe_image",
+        new=AsyncMock(side_effect=["Net sales 85,777", "Net sales 90,753"]),
+    ) as mock_describe:
+
+        first = asyncio.run(summarize_financial_images([first_table]))
+        second = asyncio.run(summarize_financial_images([other_table]))
+        # identical pixels in another encoding are still a hit
+        third = asyncio.run(summarize_financial_images([recompressed]))
+
+        assert first == ["Net sales 85,777"]
+        assert second == ["Net sales 90,753"]
+        assert third == ["Net sales 85,777"]
+        assert mock_describe.await_count == 2
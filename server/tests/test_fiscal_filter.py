@@ -0,0 +1,32 @@
+from utils.extractors.fiscal_filter import extract_fiscal_filter, build_where_filter
+
+
+def test_extracts_known_ticker_year_and_quarter():
+    info = extract_fiscal_filter("What was AAPL revenue in Q3 2024?", known_tickers={"AAPL", "MSFT"})
+
+    assert info == {"ticker": ["AAPL"], "year": [2024], "period": ["Q3"]}
+    assert build_where_filter(info) == {
+        "$and": [{"ticker": "AAPL"}, {"year": 2024}, {"period": "Q3"}]
+    }
+
+
+def test_ignores_unknown_upper_case_words():
+    info = extract_fiscal_filter("How did EPS change in the second quarter?", known_tickers={"AAPL"})
+
+    assert info == {"ticker": [], "year": [], "period": ["Q2"]}
+    assert build_where_filter(info) == {"period": "Q2"}
+
+
+def test_multiple_values_use_in():
+    info = extract_fiscal_filter("Compare $AAPL and $MSFT margins for 2023 and 2024")
+
+    assert build_where_filter(info) == {
+        "$and": [
+            {"ticker": {"$in": ["AAPL", "MSFT"]}},
+            {"year": {"$in": [2023, 2024]}},
+        ]
+    }
+
+
+def test_no_constraint_means_no_filter():
+    assert build_where_filter(extract_fiscal_filter("Summarize the risk factors")) is None
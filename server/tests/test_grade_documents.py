@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.chain import grading_batches
+from graph.nodes import grade_documents_node
+
+
+def context(doc_id, score):
+    return {"content": f"{doc_id} content", "source": f"{doc_id}.pdf", "pages": [1], "doc_id": doc_id, "score": score}
+
+
+DOCUMENTS = [context("high", 6.0), context("borderline", 0.5), context("low", -7.0), context("unscored", None)]
+
+
+def grader(verdicts):
+    """Fake grader chain answering per document content."""
+    chain = MagicMock()
+    chain.ainvoke = AsyncMock(side_effect=lambda inputs: SimpleNamespace(binary_score=verdicts[inputs["context"]]))
+    return chain
+
+
+def batch_grader(verdicts, skip=()):
+    """Fake batched grader chain; leaves out the ids in `skip`."""
+    def answer(inputs):
+        ids = [part.split('"')[0] for part in inputs["documents"].split('<document id="')[1:]]
+        return SimpleNamespace(verdicts=[
+            SimpleNamespace(id=doc_id, binary_score=verdicts[doc_id]) for doc_id in ids if doc_id not in skip
+        ])
+    chain = MagicMock()
+    chain.ainvoke = AsyncMock(side_effect=answer)
+    return chain
+
+
+def grade(documents):
+    return asyncio.run(grade_documents_node({"question": "What was revenue?", "documents": documents}))
+
+
+# score mode: confident scores skip the LLM, borderline/unscored ones are escalated
+def test_score_mode_escalates_only_borderline_documents():
+    chain = grader({"borderline content": "yes", "unscored content": "no"})
+    with patch("graph.nodes.GRADING_MODE", "score"), patch("graph.nodes.GRADER_BATCHING", False), \
+            patch("graph.nodes.get_grader_chain", return_value=chain):
+        result = grade(DOCUMENTS)
+
+    assert [d["doc_id"] for d in result["documents"]] == ["high", "borderline"]
+    graded = [call.args[0]["context"] for call in chain.ainvoke.await_args_list]
+    assert graded == ["borderline content", "unscored content"]
+
+
+# llm mode grades every document, reading the DocumentContext content
+def test_llm_mode_grades_every_document():
+    chain = grader({f"{d['doc_id']} content": "yes" if d["doc_id"] != "high" else "no" for d in DOCUMENTS})
+    with patch("graph.nodes.GRADING_MODE", "llm"), patch("graph.nodes.GRADER_BATCHING", False), \
+            patch("graph.nodes.get_grader_chain", return_value=chain):
+        result = grade(DOCUMENTS)
+
+    assert chain.ainvoke.await_count == 4
+    assert [d["doc_id"] for d in result["documents"]] == ["borderline", "low", "unscored"]
+
+
+# batched mode grades everything in size-capped calls; skipped ids fall back to the single grader
+def test_batched_mode_splits_and_backfills_missing_ids():
+    batch = batch_grader({"doc-0": "yes", "doc-1": "no", "doc-2": "no", "doc-3": "yes"}, skip={"doc-2"})
+    single = grader({"low content": "yes"})
+    with patch("graph.nodes.GRADING_MODE", "llm"), patch("graph.nodes.GRADER_BATCHING", True), \
+            patch("graph.nodes.GRADER_BATCH_MAX_CHARS", 30), \
+            patch("graph.nodes.get_batch_grader_chain", return_value=batch), \
+            patch("graph.nodes.get_grader_chain", return_value=single):
+        result = grade(DOCUMENTS)
+
+    assert batch.ainvoke.await_count == 2
+    assert single.ainvoke.await_count == 1
+    assert [d["doc_id"] for d in result["documents"]] == ["high", "low", "unscored"]
+
+
+def test_grading_batches_respect_the_size_cap():
+    items = [("a", "x" * 10), ("b", "x" * 10), ("c", "x" * 25), ("d", "x" * 5)]
+
+    batches = grading_batches(items, max_chars=20)
+
+    assert [[doc_id for doc_id, _ in batch] for batch in batches] == [["a", "b"], ["c"], ["d"]]
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from graph.edges import grade_generation
+from graph.nodes import grade_generation_node
+
+STATE = {
+    "question": "What was AAPL revenue in Q2 2024?",
+    "generation": "Revenue was $85.8B [Source: aapl.pdf, Page: 3].",
+    "documents": [{"content": "<<< PAGE 3 >>>\nTotal net sales 85,777", "source": "aapl.pdf", "pages": [3], "doc_id": "p1"}],
+}
+
+
+def slow_grader(score, started):
+    async def answer(inputs):
+        started.append(inputs)
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(binary_score=score)
+    chain = MagicMock()
+    chain.ainvoke = AsyncMock(side_effect=answer)
+    return chain
+
+
+# both graders run at once and their verdicts land in one update
+def test_graders_run_concurrently():
+    started = []
+    with patch("graph.nodes.get_hallucination_chain", return_value=slow_grader("yes", started)), \
+            patch("graph.nodes.get_answer_grader_chain", return_value=slow_grader("yes", started)):
+        update = asyncio.run(asyncio.wait_for(grade_generation_node(STATE), timeout=0.18))
+
+    assert update == {"is_grounded": "yes", "is_useful": "yes", "documents": []}
+    assert "Total net sales" in started[0]["documents"]  # DocumentContext content, not page_content
+
+
+# a hallucination keeps the documents so the rewrite can explain the failure
+def test_hallucination_keeps_documents():
+    with patch("graph.nodes.get_hallucination_chain", return_value=slow_grader("no", [])), \
+            patch("graph.nodes.get_answer_grader_chain", return_value=slow_grader("yes", [])):
+        update = asyncio.run(grade_generation_node(STATE))
+
+    assert update == {"is_grounded": "no", "is_useful": "yes"}
+
+
+# same retry semantics as check_hallucination followed by answer_evaluator
+@pytest.mark.parametrize("grounded, useful, retries, route", [
+    ("yes", "yes", 0, "useful"),
+    ("no", "yes", 0, "hallucinated"),
+    ("no", "no", 2, "hallucinated"),
+    ("yes", "no", 1, "not_useful"),
+    ("no", "no", 3, "useful"),
+    ("yes", "no", 3, "useful"),
+])
+def test_grade_generation_routes(grounded, useful, retries, route):
+    state = {"is_grounded": grounded, "is_useful": useful, "retry_count": retries}
+    assert grade_generation(state) == route
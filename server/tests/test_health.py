@@ -0,0 +1,22 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app import app
+
+
+# liveness answers immediately; readiness flips once warmup has loaded everything
+def test_readiness_follows_warmup():
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+
+        deadline = time.time() + 30
+        response = client.get("/health/ready")
+        while response.status_code == 503 and time.time() < deadline:
+            time.sleep(0.05)
+            response = client.get("/health/ready")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready"
+        assert set(body["components"]) == {"vectorstore", "reranker", "clients"}
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("usearch")
+
+from core.hnsw_index import HnswIndex
+
+DIM = 16
+
+
+def make_chunks(parent_id, ticker, year, period, n, rng):
+    ids = [f"{parent_id}:{i}:0" for i in range(n)]
+    metas = [
+        {"parent_id": parent_id, "ticker": ticker, "year": year, "period": period, "element_index": i}
+        for i in range(n)
+    ]
+    texts = [f"{ticker} {period} {year} element {i}" for i in range(n)]
+    return ids, rng.standard_normal((n, DIM)).astype(np.float32), texts, metas
+
+
+@pytest.fixture
+def filled(tmp_path):
+    rng = np.random.default_rng(0)
+    index = HnswIndex(str(tmp_path / "hnsw"), dtype="f32", max_segments=100)
+    chunks = {
+        "a": make_chunks("a", "AAPL", 2024, "Q2", 40, rng),
+        "b": make_chunks("b", "MSFT", 2024, "Q2", 40, rng),
+        "c": make_chunks("c", "AAPL", 2023, "Q3", 40, rng),
+    }
+    for ids, vectors, texts, metas in chunks.values():
+        index.add(ids, vectors, texts, metas)
+    return index, chunks
+
+
+# nearest neighbour comes back as a Document with the chunk id
+def test_search_finds_nearest_chunk(filled):
+    index, chunks = filled
+    ids, vectors, texts, _ = chunks["b"]
+
+    hits = index.similarity_search_by_vector(vectors[7], k=3)
+
+    assert hits[0].id == ids[7]
+    assert hits[0].page_content == texts[7]
+    assert hits[0].metadata["ticker"] == "MSFT"
+
+
+# where filters hold on both the exact-scan and the ANN path
+@pytest.mark.parametrize("exact_max", [4096, 0])
+def test_search_applies_where_filter(filled, exact_max):
+    index, chunks = filled
+    index.exact_max = exact_max
+    _, vectors, _, _ = chunks["b"]
+    where = {"$and": [{"ticker": {"$in": ["AAPL"]}}, {"year": {"$in": [2024]}}]}
+
+    hits = index.similarity_search_by_vector(vectors[7], k=5, where=where)
+
+    assert len(hits) == 5
+    assert all(h.metadata["parent_id"] == "a" for h in hits)
+
+
+# deletes are tombstones until a merge rewrites the live vectors
+def test_delete_and_compact(filled):
+    index, chunks = filled
+    ids, vectors, _, _ = chunks["a"]
+    index.delete(ids)
+
+    assert len(index) == 80
+    assert index.get(where={"parent_id": "a"}, include=[])["ids"] == []
+    assert all(h.metadata["parent_id"] != "a" for h in index.similarity_search_by_vector(vectors[0], k=10))
+
+    assert index.compact() == 80
+    assert len(index._refresh()) == 1
+    b_ids, b_vectors, _, _ = chunks["b"]
+    assert index.similarity_search_by_vector(b_vectors[3], k=1)[0].id == b_ids[3]
+
+
+# a second handle (another worker process) maps segments written by the first
+def test_second_handle_sees_new_segments(filled, tmp_path):
+    index, chunks = filled
+    reader = HnswIndex(index.directory, dtype="f32")
+    ids, vectors, _, _ = chunks["c"]
+    assert reader.similarity_search_by_vector(vectors[1], k=1)[0].id == ids[1]
+
+    rng = np.random.default_rng(1)
+    new_ids, new_vectors, new_texts, new_metas = make_chunks("d", "NVDA", 2025, "Q1", 5, rng)
+    index.add(new_ids, new_vectors, new_texts, new_metas)
+
+    assert reader.similarity_search_by_vector(new_vectors[2], k=1)[0].id == new_ids[2]
+    page = reader.get(include=["documents", "metadatas"], limit=10, offset=120)
+    assert page["ids"] == new_ids
+    assert page["metadatas"][0]["ticker"] == "NVDA"
+
+
+# past max_segments the smaller half is merged automatically
+def test_segments_are_merged_past_limit(tmp_path):
+    rng = np.random.default_rng(2)
+    index = HnswIndex(str(tmp_path / "hnsw"), dtype="f32", max_segments=3)
+    for n in range(5):
+        index.add(*make_chunks(f"p{n}", "AAPL", 2024, "Q2", 10, rng))
+
+    assert len(index._refresh()) <= 3
+    assert len(index) == 50
@@ -1,9 +1,16 @@
+import asyncio
+import threading
+import time
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 
 from app import app
 from schemas import TenQMetadata
+from core.ingest_registry import IngestRegistry
+from core.parent_store import ParentStore
+from core.lexical_index import BM25Index
+from core.vectorstore import get_vector_access
 
 class FakeMetadata:
     def __init__(
@@ -23,10 +30,50 @@ class FakeElement:
         self.text = text
         self.metadata = metadata or FakeMetadata()
 
-client = TestClient(app)
+UPLOAD = {"file": ("test.pdf", b"%PDF-1.4 fake pdf", "application/pdf")}
+
+# entering the client runs the lifespan, which starts the ingest workers
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+# every test starts with an empty dedup registry
+@pytest.fixture(autouse=True)
+def isolated_registry(tmp_path):
+    registry = IngestRegistry(str(tmp_path / "ingest_registry.sqlite3"))
+    with patch("router.ingest.get_ingest_registry", return_value=registry), \
+            patch("core.ingestion.get_ingest_registry", return_value=registry):
+        yield registry
+
+@pytest.fixture(autouse=True)
+def isolated_parent_store(tmp_path):
+    store = ParentStore(str(tmp_path / "parents.sqlite3"))
+    with patch("core.ingestion.get_parent_store", return_value=store):
+        yield store
+
+@pytest.fixture(autouse=True)
+def isolated_lexical_index(tmp_path):
+    index = BM25Index(str(tmp_path / "lexical_index.sqlite3"))
+    with patch("core.ingestion.get_lexical_index", return_value=index):
+        yield index
+
+def ingest(client, files=UPLOAD, params=None, timeout=5, url="/ingest"):
+    """Submits an ingest job and polls until it finishes."""
+    response = client.post(url, files=files, params=params)
+    assert response.status_code == 202
+
+    job_id = response.json()["job_id"]
+    deadline = time.time() + timeout
+    while True:
+        response = client.get(f"/ingest/{job_id}")
+        job = response.json()
+        if job["status"] in ("completed", "failed") or time.time() > deadline:
+            return response
+        time.sleep(0.01)
 
 # case: regex captures all metadata
-def test_ingest_10q_regex_only():
+def test_ingest_10q_regex_only(client):
     fake_elements = [
         FakeElement(
             category="NarrativeText",
@@ -36,30 +83,22 @@ def test_ingest_10q_regex_only():
     ]
 
     with patch(
-        "router.ingest.partition_pdf",
+        "core.ingestion.partition_pdf",
         return_value=fake_elements,
-    ), patch(
-        "router.ingest.vectorstore.aadd_texts",
+    ), patch.object(
+        get_vector_access(), "add_texts",
         new_callable=AsyncMock,
     ) as mock_add, patch(
-        "router.ingest.llm_extract_tenq_metadata",
+        "core.ingestion.llm_extract_tenq_metadata",
         new_callable=AsyncMock,
     ) as mock_llm:
 
-        response = client.post(
-            "/ingest",
-            files={
-                "file": (
-                    "test.pdf",
-                    b"%PDF-1.4 fake pdf",
-                    "application/pdf",
-                )
-            },
-        )
+        response = ingest(client)
 
         assert response.status_code == 200
+        assert response.json()["status"] == "completed"
 
-        data = response.json()
+        data = response.json()["result"]
         assert data["ticker"] == "AAPL"
         assert data["year"] == 2024
         assert data["period"] == "Q2"
@@ -69,7 +108,7 @@ def test_ingest_10q_regex_only():
         mock_add.assert_awaited_once()
 
 # case: fallback to llm metadata extraction
-def test_ingest_10q_llm_fallback():
+def test_ingest_10q_llm_fallback(client):
     fake_elements = [
         FakeElement(
             category="NarrativeText",
@@ -85,30 +124,22 @@ def test_ingest_10q_llm_fallback():
     )
 
     with patch(
-        "router.ingest.partition_pdf",
+        "core.ingestion.partition_pdf",
         return_value=fake_elements,
-    ), patch(
-        "router.ingest.vectorstore.aadd_texts",
+    ), patch.object(
+        get_vector_access(), "add_texts",
         new_callable=AsyncMock,
     ), patch(
-        "router.ingest.llm_extract_tenq_metadata",
+        "core.ingestion.llm_extract_tenq_metadata",
         new=AsyncMock(return_value=llm_result),
     ) as mock_llm:
 
-        response = client.post(
-            "/ingest",
-            files={
-                "file": (
-                    "test.pdf",
-                    b"%PDF-1.4 fake pdf",
-                    "application/pdf",
-                )
-            },
-        )
+        response = ingest(client)
 
         assert response.status_code == 200
+        assert response.json()["status"] == "completed"
 
-        data = response.json()
+        data = response.json()["result"]
         assert data["ticker"] == "MSFT"
         assert data["year"] == 2023
         assert data["period"] == "Q3"
@@ -117,7 +148,7 @@ def test_ingest_10q_llm_fallback():
         mock_llm.assert_awaited_once()
 
 # check metadata modality inserted into vector db
-def test_ingest_modality_metadata():
+def test_ingest_modality_metadata(client):
     fake_elements = [
         FakeElement(
             category="Table",
@@ -130,17 +161,17 @@ def test_ingest_modality_metadata():
     ]
 
     with patch(
-        "router.ingest.partition_pdf",
+        "core.ingestion.partition_pdf",
         return_value=fake_elements,
     ), patch(
-        "router.ingest.regex_extract_tenq_metadata",
+        "core.ingestion.regex_extract_tenq_metadata",
         return_value=TenQMetadata(
             ticker="AAPL",
             year=2024,
             period="Q2",
         ),
     ), patch(
-        "router.ingest.llm_extract_tenq_metadata",
+        "core.ingestion.llm_extract_tenq_metadata",
         new=AsyncMock(
             return_value=TenQMetadata(
                 ticker="AAPL",
@@ -148,25 +179,337 @@ def test_ingest_modality_metadata():
                 period="Q2",
             )
         ),
-    ), patch(
-        "router.ingest.vectorstore.aadd_texts",
+    ), patch.object(
+        get_vector_access(), "add_texts",
         new_callable=AsyncMock,
     ) as mock_add:
 
 
-        client.post(
-            "/ingest",
-            files={
-                "file": (
-                    "test.pdf",
-                    b"%PDF-1.4 fake pdf",
-                    "application/pdf",
-                )
-            },
-        )
+        ingest(client)
 
         _, kwargs = mock_add.await_args
         metadatas = kwargs["metadatas"]
 
         assert metadatas[0]["modality"] == "table"
         assert metadatas[1]["modality"] == "text"
+
+# image summaries run concurrently but keep element order
+def test_ingest_image_summaries_keep_element_order(client):
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+        ),
+        FakeElement(category="Image", metadata=FakeMetadata(image_base64="slow")),
+        FakeElement(category="NarrativeText", text="Between the charts"),
+        FakeElement(category="Image", metadata=FakeMetadata(image_base64="fast")),
+    ]
+
+    async def fake_summarize(base64_str):
+        await asyncio.sleep(0.05 if base64_str == "slow" else 0)
+        return f"summary of {base64_str}"
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ), patch(
+        "utils.vision.financial_image.summarize_financial_image",
+        new=fake_summarize,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add:
+
+        ingest(client)
+
+        _, kwargs = mock_add.await_args
+        texts = kwargs["texts"]
+        metadatas = kwargs["metadatas"]
+
+        assert texts[1] == "summary of slow"
+        assert texts[3] == "summary of fast"
+        assert [m["element_index"] for m in metadatas] == [0, 1, 2, 3]
+        assert metadatas[1]["modality"] == "image"
+
+# case: re-upload of the same bytes is served from the registry
+def test_ingest_duplicate_skips_partition_and_embedding(client):
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+        )
+    ]
+    with patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ) as mock_partition, patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add, patch(
+        "core.ingestion.delete_parent",
+        new_callable=AsyncMock,
+    ) as mock_delete:
+
+        first = ingest(client).json()["result"]
+        second = ingest(client).json()["result"]
+
+        assert second["status"] == "duplicate"
+        assert second["parent_id"] == first["parent_id"]
+        assert second["chunks"] == first["chunks"]
+        assert mock_partition.call_count == 1
+        mock_add.assert_awaited_once()
+
+        # force=true re-ingests and drops the previous copy
+        forced = ingest(client, params={"force": "true"}).json()["result"]
+
+        assert forced["status"] == "success"
+        assert forced["parent_id"] != first["parent_id"]
+        assert mock_partition.call_count == 2
+        mock_delete.assert_awaited_once_with(first["parent_id"])
+
+# concurrent uploads of the same bytes share the in-flight job
+def test_ingest_concurrent_duplicate_shares_job(client):
+    release = threading.Event()
+
+    def slow_partition(**kwargs):
+        release.wait(timeout=5)
+        return [
+            FakeElement(
+                category="NarrativeText",
+                text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+            )
+        ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        side_effect=slow_partition,
+    ) as mock_partition, patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add:
+
+        first = client.post("/ingest", files=UPLOAD).json()
+        second = client.post("/ingest", files=UPLOAD).json()
+        release.set()
+
+        assert second["job_id"] == first["job_id"]
+        deadline = time.time() + 5
+        while client.get(f"/ingest/{first['job_id']}").json()["status"] != "completed":
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        assert mock_partition.call_count == 1
+        mock_add.assert_awaited_once()
+
+# unknown job ids are reported as 404
+def test_ingest_status_unknown_job(client):
+    response = client.get("/ingest/does-not-exist")
+    assert response.status_code == 404
+
+# spooled uploads are removed after the job, and oversized ones are rejected
+def test_ingest_spool_cleanup_and_size_limit(client, tmp_path):
+    spool_dir = tmp_path / "spool"
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+        )
+    ]
+
+    with patch(
+        "router.ingest.SPOOL_DIR",
+        str(spool_dir),
+    ), patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ):
+        response = ingest(client)
+
+        assert response.json()["status"] == "completed"
+        assert list(spool_dir.iterdir()) == []
+
+        with patch("router.ingest.MAX_UPLOAD_MB", 0):
+            response = client.post("/ingest", files=UPLOAD)
+
+        assert response.status_code == 413
+        assert list(spool_dir.iterdir()) == []
+
+# batch: per-file results in upload order, one Chroma write for small batches
+def test_ingest_batch_pipelines_files(client):
+    def fake_partition(filename, **kwargs):
+        with open(filename, "rb") as f:
+            ticker = f.read().decode().split()[-1]
+        return [
+            FakeElement(
+                category="NarrativeText",
+                text=f"Trading Symbol: {ticker}\nFor the quarterly period ended June 30, 2024",
+            ),
+            FakeElement(category="NarrativeText", text="Results of operations"),
+        ]
+
+    files = [
+        ("files", ("aapl.pdf", b"%PDF-1.4 AAPL", "application/pdf")),
+        ("files", ("msft.pdf", b"%PDF-1.4 MSFT", "application/pdf")),
+        ("files", ("aapl-copy.pdf", b"%PDF-1.4 AAPL", "application/pdf")),
+    ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        side_effect=fake_partition,
+    ) as mock_partition, patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add:
+
+        response = ingest(client, files=files, url="/ingest/batch")
+        results = response.json()["result"]
+
+        assert response.json()["filenames"] == ["aapl.pdf", "msft.pdf", "aapl-copy.pdf"]
+
+        assert [r["filename"] for r in results] == ["aapl.pdf", "msft.pdf", "aapl-copy.pdf"]
+        assert [r["ticker"] for r in results] == ["AAPL", "MSFT", "AAPL"]
+        assert [r["status"] for r in results] == ["success", "success", "duplicate"]
+        assert results[2]["parent_id"] == results[0]["parent_id"]
+        assert mock_partition.call_count == 2
+
+        mock_add.assert_awaited_once()
+        _, kwargs = mock_add.await_args
+        assert len(kwargs["texts"]) == 4
+
+# a failed batch write rolls back what was written and registers nothing
+def test_ingest_batch_rolls_back_failed_write(client, isolated_registry):
+    def fake_partition(filename, **kwargs):
+        with open(filename, "rb") as f:
+            ticker = f.read().decode().split()[-1]
+        return [
+            FakeElement(
+                category="NarrativeText",
+                text=f"Trading Symbol: {ticker}\nFor the quarterly period ended June 30, 2024",
+            )
+        ]
+
+    files = [
+        ("files", ("aapl.pdf", b"%PDF-1.4 AAPL", "application/pdf")),
+        ("files", ("msft.pdf", b"%PDF-1.4 MSFT", "application/pdf")),
+    ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        side_effect=fake_partition,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+        side_effect=RuntimeError("disk full"),
+    ), patch(
+        "core.ingestion.delete_parent",
+        new_callable=AsyncMock,
+    ) as mock_delete:
+
+        results = ingest(client, files=files, url="/ingest/batch").json()["result"]
+
+        assert [r["status"] for r in results] == ["failed", "failed"]
+        assert mock_delete.await_count == 2
+        assert isolated_registry.parent_ids_matching({}) == []
+
+# the anchored parent document is materialized at ingest time
+def test_ingest_materializes_parent_document(client, isolated_parent_store):
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+            metadata=FakeMetadata(page_number=1),
+        ),
+        FakeElement(category="NarrativeText", text="Revenue grew", metadata=FakeMetadata(page_number=2)),
+        FakeElement(category="NarrativeText", text="Margins held", metadata=FakeMetadata(page_number=2)),
+    ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ):
+        result = ingest(client).json()["result"]
+
+    document = isolated_parent_store.get(result["parent_id"])
+
+    assert document["source"] == "test.pdf"
+    assert document["pages"] == [1, 2]
+    assert document["content"].count("<<< PAGE 2 >>>") == 1
+    assert document["content"].index("Revenue grew") < document["content"].index("Margins held")
+
+    window = isolated_parent_store.get_window(result["parent_id"], 1, 2)
+    assert [e["text"] for e in window] == ["Revenue grew", "Margins held"]
+
+# oversized tables are split by row into bounded children of one element
+def test_ingest_splits_oversized_table(client):
+    rows = "".join(f"<tr><td>Segment {i}</td><td>{i * 1000}</td></tr>" for i in range(200))
+    table_html = "<table><tr><th>Segment</th><th>Revenue</th></tr>" + rows + "</table>"
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+            metadata=FakeMetadata(page_number=1),
+        ),
+        FakeElement(
+            category="Table",
+            text="table text",
+            metadata=FakeMetadata(page_number=2, text_as_html=table_html),
+        ),
+    ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add, patch("core.ingestion.CHUNK_MAX_CHARS", 1000):
+
+        response = ingest(client)
+        assert response.json()["status"] == "completed"
+
+        _, kwargs = mock_add.await_args
+        table_chunks = [
+            (text, meta)
+            for text, meta in zip(kwargs["texts"], kwargs["metadatas"])
+            if meta["modality"] == "table"
+        ]
+
+        assert len(table_chunks) > 1
+        assert {meta["element_index"] for _, meta in table_chunks} == {1}
+        assert [meta["chunk_index"] for _, meta in table_chunks] == list(range(len(table_chunks)))
+        for text, _ in table_chunks:
+            assert len(text) <= 1000
+            assert text.startswith("<table><tr><th>Segment</th>")
+
+# chunks are BM25-indexed under the same ids they get in Chroma
+def test_ingest_indexes_chunks_for_bm25(client, isolated_lexical_index):
+    fake_elements = [
+        FakeElement(
+            category="NarrativeText",
+            text="Trading Symbol: AAPL\nFor the quarterly period ended June 30, 2024",
+            metadata=FakeMetadata(page_number=1),
+        ),
+        FakeElement(category="NarrativeText", text="Services revenue grew 14%", metadata=FakeMetadata(page_number=2)),
+    ]
+
+    with patch(
+        "core.ingestion.partition_pdf",
+        return_value=fake_elements,
+    ), patch.object(
+        get_vector_access(), "add_texts",
+        new_callable=AsyncMock,
+    ) as mock_add:
+        ingest(client)
+
+        _, kwargs = mock_add.await_args
+        hits = isolated_lexical_index.search("services revenue", k=5)
+
+        assert len(isolated_lexical_index) == 2
+        assert hits[0].page_content == "Services revenue grew 14%"
+        assert hits[0].id in kwargs["ids"]
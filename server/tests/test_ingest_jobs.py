@@ -0,0 +1,29 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from core.ingest_jobs import IngestJobQueue
+
+
+# a job the queue never ran is failed on shutdown and its uploads are removed
+def test_stop_cancels_queued_jobs_and_removes_spool_files(tmp_path):
+    spooled = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+    for path in spooled:
+        path.write_bytes(b"%PDF-1.4")
+    run = AsyncMock(return_value=[])
+
+    async def submit_and_stop():
+        jobs = IngestJobQueue(workers=1)
+        job = jobs.submit(
+            run,
+            spool_paths=[str(path) for path in spooled],
+            items=[{"filename": "a.pdf"}, {"filename": "b.pdf"}],
+        )
+        await jobs.stop()
+        return job
+
+    job = asyncio.run(submit_and_stop())
+
+    run.assert_not_awaited()
+    assert job["filenames"] == ["a.pdf", "b.pdf"]
+    assert (job["status"], job["error"]) == ("failed", "cancelled")
+    assert not any(path.exists() for path in spooled)
@@ -0,0 +1,87 @@
+import threading
+
+from langchain_core.documents import Document
+from core.lexical_index import BM25Index, reciprocal_rank_fusion
+
+
+def meta(parent_id, element_index, ticker="AAPL", year=2024, period="Q2"):
+    return {
+        "parent_id": parent_id,
+        "element_index": element_index,
+        "chunk_index": 0,
+        "ticker": ticker,
+        "year": year,
+        "period": period,
+    }
+
+
+def test_bm25_ranks_filters_and_deletes(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.add(
+        ["a:0:0", "a:1:0", "b:0:0"],
+        [
+            "Net sales by segment",
+            "<table><tr><td>iPhone net sales</td><td>39,296</td></tr></table>",
+            "Azure and other cloud services net sales",
+        ],
+        [meta("a", 0), meta("a", 1), meta("b", 0, ticker="MSFT")],
+    )
+
+    hits = index.search("iPhone net sales", k=3)
+    assert [h.id for h in hits][0] == "a:1:0"
+    assert "39,296" in hits[0].page_content
+
+    msft = index.search("net sales", k=3, where={"$and": [{"ticker": "MSFT"}, {"year": {"$in": [2024]}}]})
+    assert [h.id for h in msft] == ["b:0:0"]
+
+    assert index.delete_parent("a") == 2
+    assert len(index) == 1
+    assert index.search("iPhone", k=3) == []
+
+
+def test_rrf_merges_shared_chunks():
+    dense = [Document(page_content="x", id="1"), Document(page_content="y", id="2")]
+    lexical = [Document(page_content="y", id="2"), Document(page_content="z", id="3")]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+
+    assert [d.id for d in fused] == ["2", "1", "3"]
+
+
+# stopwords and near-universal terms don't drive the ranking or the postings read
+def test_common_terms_are_skipped(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"), max_df_ratio=0.5)
+    texts = [
+        "Revenue for the quarter was 85,777",
+        "Gross margin for the quarter",
+        "Operating expenses for the quarter",
+        "Share repurchases for the quarter",
+    ]
+    index.add([f"a:{i}:0" for i in range(4)], texts, [meta("a", i) for i in range(4)])
+
+    assert index.search("what was the", k=3) == []
+    # "quarter" is in every chunk, so "revenue" alone decides
+    assert [h.id for h in index.search("what was the revenue in the quarter", k=3)] == ["a:0:0"]
+    # with only common terms left, the rarest one is still searched
+    assert len(index.search("the quarter", k=10)) == 4
+
+    # df is maintained on delete, so the next add sees "quarter" as rare again
+    index.delete_parent("a")
+    index.add(["b:0:0"], ["Net sales for the quarter"], [meta("b", 0)])
+    index.add(["c:0:0", "c:1:0"], ["Cash flow", "Debt maturities"], [meta("c", 0), meta("c", 1)])
+    assert [h.id for h in index.search("quarter", k=3)] == ["b:0:0"]
+
+
+# searches use their own connection and never wait on the writer lock
+def test_search_does_not_take_the_writer_lock(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.add(["a:0:0"], ["iPhone net sales"], [meta("a", 0)])
+    result = []
+
+    with index._lock:
+        reader = threading.Thread(target=lambda: result.append(index.search("iphone", k=1)))
+        reader.start()
+        reader.join(timeout=5)
+
+    assert not reader.is_alive()
+    assert [h.id for h in result[0]] == ["a:0:0"]
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from pypdf import PdfReader, PdfWriter
+
+from utils.pdf_partition import partition_pdf_sharded, split_pdf
+
+PAGES = 5
+
+
+def write_pdf(path):
+    # page widths 101..105 identify each page after splitting
+    writer = PdfWriter()
+    for page in range(1, PAGES + 1):
+        writer.add_blank_page(width=100 + page, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def page_widths(path):
+    return [int(page.mediabox.width) for page in PdfReader(path).pages]
+
+
+# two elements per page, numbered shard-locally as unstructured does
+def fake_partition_pdf(filename, **settings):
+    return [
+        SimpleNamespace(text=f"page {width - 100}", metadata=SimpleNamespace(page_number=local))
+        for local, width in enumerate(page_widths(filename), start=1)
+        for _ in range(2)
+    ]
+
+
+def test_split_pdf_writes_page_range_shards(tmp_path):
+    pdf_path = write_pdf(tmp_path / "filing.pdf")
+    out_dir = tmp_path / "shards"
+    out_dir.mkdir()
+
+    shards = split_pdf(pdf_path, 2, str(out_dir))
+
+    assert [(os.path.basename(path), first) for path, first in shards] == [
+        ("shard_00000.pdf", 1), ("shard_00002.pdf", 3), ("shard_00004.pdf", 5),
+    ]
+    assert [page_widths(path) for path, _ in shards] == [[101, 102], [103, 104], [105]]
+
+
+# shard-local page numbers come back document-global, in page order
+def test_partition_pdf_sharded_renumbers_pages(tmp_path):
+    pdf_path = write_pdf(tmp_path / "filing.pdf")
+
+    with ThreadPoolExecutor(max_workers=2) as executor, \
+            patch("unstructured.partition.pdf.partition_pdf", new=fake_partition_pdf), \
+            patch("utils.pdf_partition.get_partition_executor", return_value=executor):
+        elements = partition_pdf_sharded(pdf_path, {"strategy": "fast"}, pages_per_shard=2, workers=2)
+
+    pages = [el.metadata.page_number for el in elements]
+    assert pages == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+    assert [el.text for el in elements] == [f"page {page}" for page in pages]
+    # the shard directory is cleaned up
+    assert os.listdir(tmp_path) == ["filing.pdf"]
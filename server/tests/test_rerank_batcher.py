@@ -0,0 +1,45 @@
+import asyncio
+
+from core.rerank_batcher import RerankBatcher
+
+
+class RecordingPredict:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, pairs):
+        self.calls.append(len(pairs))
+        return [float(len(passage)) for _, passage in pairs]
+
+
+# concurrent callers share one forward pass and get their own scores back
+def test_concurrent_requests_are_batched():
+    predict = RecordingPredict()
+    batcher = RerankBatcher(predict, max_batch_pairs=64, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.score([("q1", "a"), ("q1", "bb")]),
+            batcher.score([("q2", "ccc")]),
+            batcher.score([("q3", "dddd"), ("q3", "e")]),
+        )
+
+    results = asyncio.run(run())
+
+    assert results == [[1.0, 2.0], [3.0], [4.0, 1.0]]
+    assert predict.calls == [5]
+
+
+# a request that would overflow the batch is scored in the next pass
+def test_batches_respect_pair_limit():
+    predict = RecordingPredict()
+    batcher = RerankBatcher(predict, max_batch_pairs=3, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.score([("q", "a"), ("q", "b")]),
+            batcher.score([("q", "c"), ("q", "d")]),
+        )
+
+    assert asyncio.run(run()) == [[1.0, 1.0], [1.0, 1.0]]
+    assert predict.calls == [2, 2]
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+pytest.importorskip("onnxruntime")
+
+from core.reranker_onnx import OnnxCrossEncoder, ensure_onnx_model
+
+PAIRS = [
+    ("what was revenue", "revenue grew 5 percent"),
+    ("q", "a much longer passage about operating margins and cash"),
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_cross_encoder(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tiny_ce"))
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list("abcdefghijklmnopqrstuvwxyz0123456789")
+    with open(os.path.join(path, "vocab.txt"), "w") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(os.path.join(path, "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, num_labels=1,
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+# the fp32 export reproduces the PyTorch scores on a padded batch
+def test_onnx_export_matches_torch(tiny_cross_encoder, tmp_path):
+    model = BertForSequenceClassification.from_pretrained(tiny_cross_encoder).eval()
+    tokenizer = BertTokenizerFast.from_pretrained(tiny_cross_encoder)
+    encoded = tokenizer([q for q, _ in PAIRS], [p for _, p in PAIRS], padding=True, return_tensors="pt")
+    with torch.no_grad():
+        expected = torch.sigmoid(model(**encoded).logits[:, 0]).numpy()
+
+    fp32 = OnnxCrossEncoder(ensure_onnx_model(tiny_cross_encoder, str(tmp_path), quantize=False))
+    np.testing.assert_allclose(fp32.predict(PAIRS), expected, atol=1e-5)
+
+    int8 = OnnxCrossEncoder(ensure_onnx_model(tiny_cross_encoder, str(tmp_path), quantize=True))
+    assert int8.predict(PAIRS, batch_size=1).shape == (2,)
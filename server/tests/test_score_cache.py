@@ -0,0 +1,43 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from core.reranker import MiniLMReranker
+from core.score_cache import ScoreCache, query_key
+
+
+class CountingScorer(MiniLMReranker):
+    """MiniLMReranker without a model: scores are passage lengths."""
+
+    def __init__(self, cache_size=100):
+        self.cache = ScoreCache(cache_size)
+        self.scored = []
+
+    async def score(self, pairs):
+        self.scored.append([passage for _, passage in pairs])
+        return [float(len(passage)) for _, passage in pairs]
+
+
+# near-identical queries reuse scores; only unseen chunks are scored
+def test_rerank_scores_only_missing_pairs():
+    reranker = CountingScorer()
+    docs = [Document(page_content="short", id="p:0:0"), Document(page_content="longer text", id="p:1:0")]
+
+    first = asyncio.run(reranker.rerank("What was revenue?", docs))
+    extra = docs + [Document(page_content="mid", id="p:2:0")]
+    second = asyncio.run(reranker.rerank("  what was REVENUE ", extra))
+
+    assert [d.id for d in first] == ["p:1:0", "p:0:0"]
+    assert [d.id for d in second] == ["p:1:0", "p:0:0", "p:2:0"]
+    assert reranker.scored == [["short", "longer text"], ["mid"]]
+    assert reranker.cache.stats()["hits"] == 2
+
+
+def test_score_cache_evicts_least_recently_used():
+    cache = ScoreCache(max_entries=2)
+    q = query_key("q")
+    cache.put_many({(q, "a"): 1.0, (q, "b"): 2.0})
+    cache.get_many([(q, "a")])
+    cache.put_many({(q, "c"): 3.0})
+
+    assert cache.get_many([(q, "a"), (q, "b"), (q, "c")]) == {(q, "a"): 1.0, (q, "c"): 3.0}
@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import patch
+
+from graph.nodes import speculative_route_node
+from graph.workflow import build_workflow
+
+STATE = {"question": "What was AAPL revenue in Q2 2024?", "messages": []}
+
+
+def fake_nodes(intent, events):
+    async def router(state):
+        events.append("route_start")
+        await asyncio.sleep(0.05)
+        events.append("route_end")
+        return {"intent": intent}
+
+    async def retrieve(state):
+        events.append("retrieve_start")
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            events.append("retrieve_cancelled")
+            raise
+        events.append("retrieve_end")
+        return {"documents": [{"doc_id": "parent-1"}], "fiscal_info": {"ticker": ["AAPL"]}}
+
+    return patch("graph.nodes.router_node", new=router), patch("graph.nodes.retrieve_node", new=retrieve)
+
+
+# retrieval starts before the router answers and its result is kept for technical turns
+def test_technical_intent_keeps_speculative_retrieval():
+    events = []
+    router, retrieve = fake_nodes("technical", events)
+    with router, retrieve:
+        result = asyncio.run(speculative_route_node(STATE))
+
+    assert events.index("retrieve_start") < events.index("route_end")
+    assert result["intent"] == "technical"
+    assert result["documents"] == [{"doc_id": "parent-1"}]
+
+
+# a conversational intent cancels the in-flight retrieval and drops it
+def test_conversational_intent_cancels_retrieval():
+    events = []
+    router, retrieve = fake_nodes("conversational", events)
+    with router, retrieve:
+        result = asyncio.run(speculative_route_node(STATE))
+
+    assert result == {"intent": "conversational"}
+    assert "retrieve_cancelled" in events
+    assert "retrieve_end" not in events
+
+
+def test_workflow_modes():
+    speculative = build_workflow(speculative_retrieval=True).compile()
+    serial = build_workflow(speculative_retrieval=False).compile()
+
+    assert "route_and_retrieve" in speculative.get_graph().nodes
+    assert "route_intent" not in speculative.get_graph().nodes
+    assert "route_intent" in serial.get_graph().nodes
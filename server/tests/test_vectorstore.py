@@ -0,0 +1,45 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.vectorstore import VectorStoreAccess
+
+
+class FakeStore:
+    def __init__(self):
+        self.threads = []
+
+    def get(self, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        return {"ids": ["a:0:0"]}
+
+    def similarity_search_by_vector(self, vector, k, filter=None):
+        self.threads.append(threading.current_thread().name)
+        return [(vector, k, filter)]
+
+
+# Chroma calls run on the dedicated pool; embedding stays on the event loop
+def test_calls_run_on_vectorstore_threads():
+    store = FakeStore()
+    embeddings = MagicMock(aembed_query=AsyncMock(return_value=[0.1, 0.2]))
+    access = VectorStoreAccess(workers=2)
+
+    async def run():
+        return await asyncio.gather(
+            access.get(where={"parent_id": "a"}, include=[]),
+            access.similarity_search("net sales", 3, {"ticker": "AAPL"}),
+        )
+
+    with patch("core.vectorstore.get_vectorstore", return_value=store), \
+            patch("core.vectorstore.get_embeddings", return_value=embeddings):
+        got, hits = asyncio.run(run())
+
+    assert got == {"ids": ["a:0:0"]}
+    assert hits == [([0.1, 0.2], 3, {"ticker": "AAPL"})]
+    assert all(name.startswith("vectorstore") for name in store.threads)
+
+    # shutdown drops the pool; the next call starts a fresh one
+    access.shutdown()
+    with patch("core.vectorstore.get_vectorstore", return_value=store):
+        assert asyncio.run(access.get()) == {"ids": ["a:0:0"]}
+    access.shutdown()
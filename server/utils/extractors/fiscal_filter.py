@@ -0,0 +1,74 @@
+import re
+from typing import Iterable, Optional
+
+# Explicit ticker mentions are trusted even if the registry has not seen them
+CASHTAG_RE = re.compile(r"\$([A-Z]{1,6})\b")
+EXCHANGE_TICKER_RE = re.compile(
+    r"\b(?:NASDAQ|NYSE|AMEX|NYSEAMERICAN)\s*:\s*([A-Z]{1,6})\b",
+    re.IGNORECASE,
+)
+# Bare upper-case words only count when they are known tickers
+UPPER_TOKEN_RE = re.compile(r"\b([A-Z]{1,6})\b")
+
+YEAR_RE = re.compile(r"(?<!\d)(?:FY\s*)?(20\d{2})(?!\d)", re.IGNORECASE)
+
+QUARTER_RE = re.compile(r"\bQ([1-4])\b|\b([1-4])Q\b", re.IGNORECASE)
+ORDINAL_QUARTER_RE = re.compile(r"\b(first|second|third|fourth)\s+(?:fiscal\s+)?quarter\b", re.IGNORECASE)
+ENDED_MONTH_RE = re.compile(
+    r"\b(?:quarter|three\s+months|period)\s+ended\s+(March|June|September|December)\b",
+    re.IGNORECASE,
+)
+
+ORDINAL_TO_Q = {"first": "Q1", "second": "Q2", "third": "Q3", "fourth": "Q4"}
+MONTH_TO_Q = {"march": "Q1", "june": "Q2", "september": "Q3", "december": "Q4"}
+
+
+def _unique(values: Iterable) -> list:
+    return list(dict.fromkeys(v for v in values if v is not None))
+
+
+def extract_fiscal_filter(question: str, known_tickers: Optional[Iterable[str]] = None) -> dict:
+    """
+    Deterministic ticker/year/quarter extraction from a user question.
+    Returns {"ticker": [...], "year": [...], "period": [...]}; empty lists
+    mean "no constraint".
+    """
+    text = question or ""
+    known = {t.upper() for t in (known_tickers or [])}
+
+    tickers = [m.upper() for m in CASHTAG_RE.findall(text)]
+    tickers += [m.upper() for m in EXCHANGE_TICKER_RE.findall(text)]
+    tickers += [m for m in UPPER_TOKEN_RE.findall(text) if m in known]
+
+    years = [int(y) for y in YEAR_RE.findall(text)]
+
+    periods = [f"Q{a or b}" for a, b in QUARTER_RE.findall(text)]
+    periods += [ORDINAL_TO_Q[m.lower()] for m in ORDINAL_QUARTER_RE.findall(text)]
+    periods += [MONTH_TO_Q[m.lower()] for m in ENDED_MONTH_RE.findall(text)]
+
+    return {
+        "ticker": _unique(tickers),
+        "year": _unique(years),
+        "period": _unique(periods),
+    }
+
+
+def build_where_filter(fiscal_info: Optional[dict]) -> Optional[dict]:
+    """
+    Turns extracted fiscal info into a Chroma `where` clause.
+    Returns None when the question carries no fiscal constraint.
+    """
+    if not fiscal_info:
+        return None
+
+    clauses = []
+    for field in ("ticker", "year", "period"):
+        values = fiscal_info.get(field) or []
+        if len(values) == 1:
+            clauses.append({field: values[0]})
+        elif values:
+            clauses.append({field: {"$in": values}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -1,6 +1,6 @@
 import re
 from schemas import TenQMetadata
-from core.llm import llm
+from core.llm import get_llm
 
 TRADING_SYMBOL_RE = re.compile(
     r"\bTrading\s+Symbol(?:s)?\b\s*[:\-]?\s*([A-Z]{1,6})\b",
@@ -59,7 +59,7 @@ def regex_extract_tenq_metadata(
 
 
 async def llm_extract_tenq_metadata(cover_text: str) -> TenQMetadata:
-    structured_llm = llm.with_structured_output(TenQMetadata)
+    structured_llm = get_llm().with_structured_output(TenQMetadata)
 
     prompt = f"""
         Extract ticker, year, and quarter from this SEC Form 10-Q cover text.
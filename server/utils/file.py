@@ -1,11 +1,39 @@
 import tempfile
 import os
 
+class UploadTooLargeError(ValueError):
+    pass
+
 def save_temp_pdf(file_bytes):
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
         tmp.write(file_bytes)
         return tmp.name  # return full path
 
+async def spool_upload(upload, spool_dir, max_bytes, chunk_size=1024 * 1024, hasher=None):
+    """
+    Streams an UploadFile to disk chunk by chunk instead of reading it
+    into memory. Feeds every chunk to `hasher` when given.
+    Returns (path, size). The partial file is removed on any failure.
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=spool_dir)
+    size = 0
+
+    try:
+        with tmp:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                if hasher is not None:
+                    hasher.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        delete_temp_file(tmp.name)
+        raise
+
+    return tmp.name, size
+
 def delete_temp_file(path):
     if os.path.exists(path):
         os.remove(path)
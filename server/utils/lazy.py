@@ -0,0 +1,23 @@
+import functools
+import threading
+
+
+def lazy_singleton(factory):
+    """
+    Turns a zero-argument factory into an accessor that builds the object
+    on first call (once, even under concurrent callers) and returns the
+    same instance afterwards. accessor.loaded() reports whether it exists yet.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.loaded = lambda: bool(instance)
+    return get
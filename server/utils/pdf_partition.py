@@ -0,0 +1,96 @@
+# utils/pdf_partition.py
+# Kept free of app imports: spawned partition workers import only this module.
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from pypdf import PdfReader, PdfWriter
+
+_executor = None
+
+
+def get_partition_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the API process has live threads and event loops
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_partition_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def split_pdf(pdf_path: str, pages_per_shard: int, out_dir: str) -> List[Tuple[str, int]]:
+    """
+    Writes page-range shards of the PDF into out_dir.
+    Returns [(shard_path, first_page_number)] in page order (1-based).
+    """
+    reader = PdfReader(pdf_path)
+    shards = []
+
+    for start in range(0, len(reader.pages), pages_per_shard):
+        writer = PdfWriter()
+        for page in reader.pages[start:start + pages_per_shard]:
+            writer.add_page(page)
+
+        shard_path = os.path.join(out_dir, f"shard_{start:05d}.pdf")
+        with open(shard_path, "wb") as f:
+            writer.write(f)
+        shards.append((shard_path, start + 1))
+
+    return shards
+
+
+def partition_shard(shard_path: str, first_page: int, settings: dict):
+    """
+    Worker-process entry point. Page numbers are shifted from
+    shard-local to document-global.
+    """
+    from unstructured.partition.pdf import partition_pdf
+
+    elements = partition_pdf(filename=shard_path, **settings)
+    for el in elements:
+        el.metadata.page_number = (el.metadata.page_number or 1) + first_page - 1
+    return elements
+
+
+def partition_pdf_sharded(
+    pdf_path: str,
+    settings: dict,
+    pages_per_shard: int,
+    workers: int,
+):
+    """
+    Partitions page-range shards in a process pool and concatenates the
+    elements in page order, so enumerate() over the result gives globally
+    consistent element indices.
+    """
+    from unstructured.partition.pdf import partition_pdf
+
+    if len(PdfReader(pdf_path).pages) <= pages_per_shard:
+        return partition_pdf(filename=pdf_path, **settings)
+
+    shard_dir = tempfile.mkdtemp(prefix="shards_", dir=os.path.dirname(pdf_path))
+    try:
+        shards = split_pdf(pdf_path, pages_per_shard, shard_dir)
+        executor = get_partition_executor(workers)
+        futures = [
+            executor.submit(partition_shard, shard_path, first_page, settings)
+            for shard_path, first_page in shards
+        ]
+
+        elements = []
+        for future in futures:
+            elements.extend(future.result())
+        return elements
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
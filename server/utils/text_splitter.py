@@ -1,8 +1,47 @@
+import re
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def split_text(docs):
+TABLE_ROW_RE = re.compile(r"<tr\b.*?</tr>", re.IGNORECASE | re.DOTALL)
+
+def split_text(docs, chunk_size=500, chunk_overlap=100):
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
     )
     return splitter.split_text(docs)
+
+def split_html_table(html, max_chars):
+    """
+    Row-aware table split: every chunk is a standalone <table> that
+    repeats the first (header) row. Falls back to plain splitting when
+    there are no rows to split on.
+    """
+    rows = TABLE_ROW_RE.findall(html)
+    if len(rows) < 2:
+        return split_text(html, chunk_size=max_chars, chunk_overlap=0)
+
+    header, body = rows[0], rows[1:]
+    wrapper = len("<table></table>") + len(header)
+
+    chunks = []
+    current = []
+    size = wrapper
+    for row in body:
+        if current and size + len(row) > max_chars:
+            chunks.append(current)
+            current, size = [], wrapper
+        current.append(row)
+        size += len(row)
+    if current:
+        chunks.append(current)
+
+    tables = ["<table>" + header + "".join(group) + "</table>" for group in chunks]
+
+    # A single row can still be over budget; hard-split just that chunk
+    bounded = []
+    for table in tables:
+        if len(table) > max_chars:
+            bounded.extend(split_text(table, chunk_size=max_chars, chunk_overlap=0))
+        else:
+            bounded.append(table)
+    return bounded
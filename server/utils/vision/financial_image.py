@@ -1,9 +1,98 @@
-async def summarize_financial_image(base64_str: str) -> str:
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, UnidentifiedImageError
+from core.llm import get_llm
+from utils.lazy import lazy_singleton
+from config import (
+    IMAGE_SUMMARY_CONCURRENCY,
+    IMAGE_MIN_AREA,
+    IMAGE_MAX_SIDE,
+    IMAGE_JPEG_QUALITY,
+    IMAGE_SUMMARY_CACHE_PATH,
+)
+
+
+class ImageSummaryCache:
     """
-    Summarize charts/images from 10-Q filings.
+    Persistent image content hash -> summary map, so recurring logos and
+    boilerplate graphics are summarized once. Only pixel-identical images
+    share a summary: two tables with the same layout but different figures
+    must never reuse each other's numbers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with sqlite3.connect(path, timeout=30) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_summaries (image_hash TEXT PRIMARY KEY, summary TEXT NOT NULL)"
+            )
+
+    def get(self, image_hash: str) -> Optional[str]:
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            row = conn.execute(
+                "SELECT summary FROM image_summaries WHERE image_hash = ?", (image_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, image_hash: str, summary: str):
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO image_summaries (image_hash, summary) VALUES (?, ?)", (image_hash, summary)
+            )
+
+
+# Opened on first use, not at import
+@lazy_singleton
+def get_image_summary_cache() -> ImageSummaryCache:
+    return ImageSummaryCache(IMAGE_SUMMARY_CACHE_PATH)
+
+# image hash -> in-flight vision call, so duplicates within a filing share one call
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def content_hash(img: Image.Image) -> str:
+    """sha256 of the decoded pixels: the same image re-encoded still matches."""
+    hasher = hashlib.sha256(f"{img.mode}:{img.width}x{img.height}:".encode())
+    hasher.update(img.tobytes())
+    return hasher.hexdigest()
+
+
+def prepare_image(base64_str: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    CPU-bound. Returns (jpeg_base64, image_hash), or None when the image is too
+    small to be worth a vision call. Images PIL cannot read are passed
+    through unchanged with no hash.
     """
     clean_base64 = base64_str.replace("\n", "").strip()
 
+    try:
+        img = Image.open(io.BytesIO(base64.b64decode(clean_base64)))
+        img.load()
+    except (binascii.Error, UnidentifiedImageError, OSError, ValueError):
+        return clean_base64, None
+
+    if img.width * img.height < IMAGE_MIN_AREA:
+        return None
+
+    image_hash = content_hash(img)
+
+    # Downscale + recompress: smaller payload, faster vision call
+    img = img.convert("RGB")
+    img.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+
+    return base64.b64encode(buf.getvalue()).decode("ascii"), image_hash
+
+
+async def describe_image(clean_base64: str) -> str:
     prompt = (
         "This image is from a US SEC Form 10-Q filing.\n"
         "If it is a financial chart or table:\n"
@@ -14,7 +103,7 @@ async def summarize_financial_image(base64_str: str) -> str:
         "Do not speculate."
     )
 
-    res = await llm.ainvoke([
+    res = await get_llm().ainvoke([
         {
             "role": "user",
             "content": [
@@ -31,3 +120,47 @@ async def summarize_financial_image(base64_str: str) -> str:
 
     return res.content.strip()
 
+
+async def summarize_financial_image(base64_str: str) -> Optional[str]:
+    """
+    Summarize charts/images from 10-Q filings.
+    Returns None for images below IMAGE_MIN_AREA (rules, icons, spacers).
+    """
+    prepared = await asyncio.to_thread(prepare_image, base64_str)
+    if prepared is None:
+        return None
+
+    jpeg_base64, image_hash = prepared
+    if image_hash is None:
+        return await describe_image(jpeg_base64)
+
+    cached = await asyncio.to_thread(get_image_summary_cache().get, image_hash)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(image_hash)
+    if task is None:
+        task = asyncio.ensure_future(describe_image(jpeg_base64))
+        _inflight[image_hash] = task
+        task.add_done_callback(lambda _: _inflight.pop(image_hash, None))
+
+    summary = await asyncio.shield(task)
+    await asyncio.to_thread(get_image_summary_cache().put, image_hash, summary)
+    return summary
+
+
+async def summarize_financial_images(
+    base64_images: List[str],
+    concurrency: int = IMAGE_SUMMARY_CONCURRENCY,
+) -> List[Optional[str]]:
+    """
+    Summarize many images concurrently, at most `concurrency` vision calls
+    in flight. Results are returned in the same order as the input.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _bounded(base64_str: str) -> Optional[str]:
+        async with semaphore:
+            return await summarize_financial_image(base64_str)
+
+    return await asyncio.gather(*(_bounded(b64) for b64 in base64_images))